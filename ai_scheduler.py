@@ -0,0 +1,78 @@
+"""
+Планировщик ИИ обычных врагов: бюджет «мышления» на тик и уровни детализации.
+
+Дорогая часть обновления врага — восприятие (can_see) и построение путей A*,
+дешёвая — шаг по уже выбранному плану. Планировщик каждый тик раздаёт
+мышление (EnemyPool.think) в порядке приоритета, пока не кончится бюджет,
+а все остальные враги только двигаются (EnemyPool.move с plan=False):
+    1. враги, у которых путь кончился между «мыслями» (replan);
+    2. ближние — в пределах радиуса обнаружения + AI_NEAR_MARGIN: думают каждый тик;
+    3. дальние — раз в AI_FAR_INTERVAL тиков.
+Внутри группы первым думает тот, кто думал давнее всех, — при нехватке
+бюджета это даёт круговую очередь, и ни один враг не «застревает».
+
+Бюджет задаётся в условных единицах (восприятие — 1, путь — AI_PATH_COST),
+а не в миллисекундах: выбор врагов не зависит от скорости машины, поэтому
+игра остаётся детерминированной и повторы (replay.py) совпадают тик в тик.
+Перерасход ограничен одним врагом: мысль, начатая в пределах бюджета, доводится до конца.
+"""
+import numpy as np
+
+from enemy_pool import HALF_SIZE
+from settings import AI_THINK_BUDGET, AI_PATH_COST, AI_NEAR_MARGIN, AI_FAR_INTERVAL
+
+PRIORITY_REPLAN = 0
+PRIORITY_NEAR = 1
+PRIORITY_FAR = 2
+PRIORITY_NONE = 3  # В этот тик не думает
+
+
+class AIScheduler:
+    def __init__(self, budget=AI_THINK_BUDGET, path_cost=AI_PATH_COST, near_margin=AI_NEAR_MARGIN,
+                 far_interval=AI_FAR_INTERVAL):
+        self.budget = budget
+        self.path_cost = path_cost
+        self.near_margin = near_margin
+        self.far_interval = far_interval
+        self.tick = 0
+        # Статистика последнего тика (для профилирования и замеров)
+        self.thoughts = 0  # Сколько врагов подумало
+        self.paths_built = 0
+        self.deferred = 0  # Сколько врагов хотели думать, но не уместились в бюджет
+
+    def candidates(self, pool, player_x, player_y):
+        """Индексы врагов, которым пора думать, в порядке (приоритет, тик последней мысли, индекс)."""
+        count = pool.count
+        last = pool.think_tick[:count]
+        replan = pool.replan[:count] != 0
+        distance = np.hypot(player_x - (pool.x[:count] + HALF_SIZE), player_y - (pool.y[:count] + HALF_SIZE))
+        near = ~replan & (distance <= pool.detect_radius[:count] + self.near_margin)
+        far = ~replan & ~near & (self.tick - last >= self.far_interval)
+        priority = np.where(replan, PRIORITY_REPLAN,
+                            np.where(near, PRIORITY_NEAR, np.where(far, PRIORITY_FAR, PRIORITY_NONE)))
+        order = np.lexsort((np.arange(count), last, priority))
+        return order[priority[order] != PRIORITY_NONE]
+
+    def run(self, pool, player_x, player_y, level):
+        """Один тик ИИ пула: мышление в пределах бюджета, движение для всех остальных."""
+        self.tick += 1
+        candidates = self.candidates(pool, player_x, player_y)
+
+        # Цена мысли зависит от её результата (нужен ли путь), поэтому восприятие считается
+        # заранее, а записывается только для уместившихся в бюджет. Мысль стоит не меньше 1,
+        # так что дальше первых budget кандидатов очередь не дойдёт.
+        # Враг думает, если до него бюджет ещё не исчерпан (перерасход — не больше одного врага)
+        head = candidates[:max(int(self.budget), 0)]
+        states, sees = pool.perceive(head, player_x, player_y, level)
+        costs = 1 + self.path_cost * pool.wants_path(head, states).astype(np.int64)
+        fits = np.cumsum(costs) - costs < self.budget
+        thinkers = head[fits]
+        self.thoughts = len(thinkers)
+        self.deferred = len(candidates) - self.thoughts
+
+        pool.replan[thinkers] = 0
+        pool.apply_perception(thinkers, states[fits], sees[fits], player_x, player_y)
+        pool.think_tick[thinkers] = self.tick
+        plan = np.zeros(pool.count, dtype=bool)
+        plan[thinkers] = True
+        self.paths_built = int(pool.move(np.arange(pool.count), player_x, player_y, level, plan).sum())
@@ -0,0 +1,147 @@
+"""
+Общий для процесса кэш графических ресурсов.
+
+Каждый спрайтовый лист загружается и нарезается на кадры один раз, а все
+экземпляры Player / Enemy получают одни и те же списки кадров. Варианты кадров
+(отражённые, масштабированные, повёрнутые) тоже строятся один раз при загрузке,
+чтобы при отрисовке не создавать новую Surface каждый кадр.
+Функции требуют уже открытого окна (convert_alpha).
+
+Все файлы из src/ описаны в манифесте src/manifest.json (тип, размер тайла,
+громкость). Фоновый загрузчик (см. loader.py) заранее декодирует картинки
+в _decoded, а музыку кладёт прямо в кэш; здесь декодированная картинка
+только переводится в формат экрана. Звуки — в audio.py.
+"""
+import io
+import json
+
+import pygame
+
+MANIFEST_PATH = "src/manifest.json"
+
+_sprite_frames = {}  # (путь, размер тайла, вариант) -> кадры по строкам листа
+_images = {}  # (путь, размер) -> Surface
+_decoded = {}  # путь -> Surface, декодированная в фоне (ещё без convert_alpha)
+_music = {}  # путь -> содержимое файла музыки
+_manifest = None  # путь -> запись манифеста
+
+
+def load_manifest(path=MANIFEST_PATH):
+    """Записи манифеста по путям файлов (читается один раз)."""
+    global _manifest
+    if _manifest is None:
+        with open(path, encoding="utf-8") as f:
+            _manifest = {entry['path']: entry for entry in json.load(f)['assets']}
+    return _manifest
+
+
+def manifest_entry(filepath):
+    return load_manifest().get(filepath, {})
+
+
+def store_decoded(filepath, surface):
+    """Картинка, декодированная фоновым загрузчиком."""
+    _decoded[filepath] = surface
+
+
+def drop_decoded(filepath):
+    _decoded.pop(filepath, None)
+
+
+def load_surface(filepath):
+    """Картинка в формате экрана: берётся из декодированных в фоне или читается с диска."""
+    surface = _decoded.pop(filepath, None)
+    if surface is None:
+        surface = pygame.image.load(filepath)
+    return surface.convert_alpha()
+
+
+def is_frame_empty(frame):
+    """Пустой ли кадр (все пиксели прозрачные): маска по альфа-каналу с порогом 0 вместо get_at на каждый пиксель."""
+    return pygame.mask.from_surface(frame, 0).count() == 0
+
+
+def load_sprite_frames(filepath, tile_width, tile_height, flip=False, scale=None, angle=0):
+    """
+    Загружает и разбивает спрайтовый лист на кадры, пропуская пустые кадры (один раз на процесс).
+    flip — отразить по горизонтали, scale — (ширина, высота) кадра, angle — поворот в градусах.
+    """
+    key = (filepath, tile_width, tile_height, flip, scale, angle)
+    sprites = _sprite_frames.get(key)
+    if sprites is not None:
+        return sprites
+
+    if flip or scale or angle:
+        # Вариант строится из исходных кадров
+        base = load_sprite_frames(filepath, tile_width, tile_height)
+        sprites = [[transform_frame(frame, flip, scale, angle) for frame in row] for row in base]
+        _sprite_frames[key] = sprites
+        return sprites
+
+    sheet = load_surface(filepath)
+    sheet_width, sheet_height = sheet.get_size()
+    sprites = []
+    for y in range(0, sheet_height, tile_height):
+        row = []
+        for x in range(0, sheet_width, tile_width):
+            rect = pygame.Rect(x, y, tile_width, tile_height)
+            frame = sheet.subsurface(rect)
+            if not is_frame_empty(frame):
+                row.append(frame)
+        sprites.append(row)
+
+    _sprite_frames[key] = sprites
+    return sprites
+
+
+def transform_frame(frame, flip=False, scale=None, angle=0):
+    if scale:
+        frame = pygame.transform.scale(frame, scale)
+    if angle:
+        frame = pygame.transform.rotate(frame, angle)
+    if flip:
+        frame = pygame.transform.flip(frame, True, False)
+    return frame
+
+
+def load_image(filepath, size=None):
+    """Загружает картинку (при необходимости масштабируя до size) один раз на процесс."""
+    key = (filepath, size)
+    image = _images.get(key)
+    if image is None:
+        image = load_surface(filepath)
+        if size is not None:
+            image = pygame.transform.scale(image, size)
+        _images[key] = image
+    return image
+
+
+def load_music_data(filepath):
+    """Читает файл музыки в память, чтобы переключение трека не ждало диска."""
+    data = _music.get(filepath)
+    if data is None:
+        with open(filepath, "rb") as f:
+            data = f.read()
+        _music[filepath] = data
+    return data
+
+
+def play_music(filepath, loops=-1):
+    """Запускает фоновую музыку (из памяти, если файл уже прочитан) с громкостью из манифеста."""
+    if not pygame.mixer.get_init():
+        return
+    pygame.mixer.music.stop()
+    data = _music.get(filepath)
+    if data is not None:
+        pygame.mixer.music.load(io.BytesIO(data), filepath)
+    else:
+        pygame.mixer.music.load(filepath)
+    pygame.mixer.music.set_volume(manifest_entry(filepath).get('volume', 1.0))
+    pygame.mixer.music.play(loops)
+
+
+def clear_cache():
+    """Сбрасывает кэш (следующая загрузка снова читает файлы с диска)."""
+    _sprite_frames.clear()
+    _images.clear()
+    _decoded.clear()
@@ -0,0 +1,230 @@
+"""
+Звуковые эффекты: кэш декодированного PCM, пул каналов и ограничение частоты.
+
+Декодирование. MP3/WAV декодируются pygame.mixer.Sound один раз, а сырые
+сэмплы (в формате текущего микшера) сохраняются в src/sounds/__cache__/*.pcm.
+При следующих запусках звук собирается прямо из буфера, без декодера.
+Кэш пересобирается, если изменился исходный файл или формат микшера.
+Файл кэша пишется во временный файл с уникальным именем и подменяется целиком,
+а один и тот же звук декодирует только один поток (загрузчик или главный).
+
+Воспроизведение. AudioSystem раздаёт фиксированный набор каналов микшера
+между категориями (интерфейс, попадания, выстрелы). У категории есть лимит
+одновременных голосов, приоритет и минимальный интервал между повторами:
+    - лимит категории исчерпан — занимается самый старый канал этой категории;
+    - свободных каналов нет — вытесняется самый старый звук с меньшим
+      приоритетом, а если такого нет — новый звук не играет;
+    - повтор того же звука раньше min_interval мс отбрасывается.
+
+Без звукового устройства (и в headless-прогонах) вместо AudioSystem
+используется NullAudio, все эффекты которого — NullSound.
+"""
+import os
+import struct
+import tempfile
+import threading
+from collections import namedtuple
+
+import pygame
+
+import assets
+
+CACHE_DIR = "__cache__"
+PCM_MAGIC = b"WPCM"
+PCM_VERSION = 1
+# magic, версия, mtime_ns и размер исходника, частота, формат и число каналов микшера
+PCM_HEADER = struct.Struct("<4sHqqihh")
+
+Category = namedtuple("Category", "voices priority min_interval")
+
+CATEGORIES = {
+    'ui': Category(voices=2, priority=3, min_interval=0),
+    'hit': Category(voices=2, priority=2, min_interval=80),
+    'shot': Category(voices=3, priority=1, min_interval=60),
+}
+DEFAULT_CATEGORY = 'shot'
+CHANNELS = 8  # Размер пула каналов микшера
+
+
+class NullSound:
+    """Заглушка вместо pygame.mixer.Sound (для запуска без звука)."""
+
+    def play(self, *args, **kwargs):
+        return None
+
+    def set_volume(self, value):
+        pass
+
+
+NULL_SOUND = NullSound()
+
+
+# -------------------------------
+#   Кэш PCM
+# -------------------------------
+def pcm_cache_path(path):
+    directory, name = os.path.split(path)
+    return os.path.join(directory, CACHE_DIR, os.path.splitext(name)[0] + ".pcm")
+
+
+def load_pcm_sound(path):
+    """
+    pygame.mixer.Sound из кэша сырых сэмплов; при промахе декодирует файл
+    и записывает кэш. Нужен инициализированный микшер.
+    """
+    frequency, size, channels = pygame.mixer.get_init()
+    cache_path = pcm_cache_path(path)
+    stat = os.stat(path)
+    try:
+        with open(cache_path, "rb") as f:
+            header = f.read(PCM_HEADER.size)
+            if len(header) == PCM_HEADER.size:
+                magic, version, mtime_ns, file_size, cached_frequency, cached_size, cached_channels = \
+                    PCM_HEADER.unpack(header)
+                if (magic == PCM_MAGIC and version == PCM_VERSION
+                        and mtime_ns == stat.st_mtime_ns and file_size == stat.st_size
+                        and (cached_frequency, cached_size, cached_channels) == (frequency, size, channels)):
+                    return pygame.mixer.Sound(buffer=f.read())
+    except OSError:
+        pass
+
+    sound = pygame.mixer.Sound(path)
+    tmp_path = None
+    try:
+        directory = os.path.dirname(cache_path)
+        os.makedirs(directory, exist_ok=True)
+        # Своё имя временного файла у каждого писателя (потоки, процессы VecEnv) —
+        # иначе два одновременных промаха пишут в один .tmp и оставляют битый кэш
+        with tempfile.NamedTemporaryFile("wb", dir=directory, suffix=".tmp", delete=False) as f:
+            tmp_path = f.name
+            f.write(PCM_HEADER.pack(PCM_MAGIC, PCM_VERSION, stat.st_mtime_ns, stat.st_size,
+                                    frequency, size, channels))
+            f.write(sound.get_raw())
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        # Каталог недоступен для записи — просто без кэша
+        if tmp_path is not None:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+    return sound
+
+
+_sounds = {}  # путь -> pygame.mixer.Sound
+_sound_locks = {}  # путь -> threading.Lock (загрузчик и главный поток могут просить один звук)
+
+
+def load_sound(path):
+    """Звук с громкостью из манифеста (один раз на процесс; нужен pygame.mixer.init)."""
+    sound = _sounds.get(path)
+    if sound is None:
+        with _sound_locks.setdefault(path, threading.Lock()):
+            sound = _sounds.get(path)  # Пока ждали, звук мог загрузить другой поток
+            if sound is None:
+                sound = load_pcm_sound(path)
+                volume = assets.manifest_entry(path).get('volume')
+                if volume is not None:
+                    sound.set_volume(volume)
+                _sounds[path] = sound
+    return sound
+
+
+# -------------------------------
+#   Воспроизведение
+# -------------------------------
+class SoundEffect:
+    """Звук с категорией: play() идёт через пул каналов AudioSystem."""
+
+    def __init__(self, audio, sound, category):
+        self.audio = audio
+        self.sound = sound
+        self.category = category
+
+    def play(self):
+        return self.audio.play(self.sound, self.category)
+
+    def set_volume(self, value):
+        self.sound.set_volume(value)
+
+
+class AudioSystem:
+    def __init__(self, channels=CHANNELS, categories=None, clock=pygame.time.get_ticks):
+        self.categories = dict(categories or CATEGORIES)
+        self.clock = clock
+        pygame.mixer.set_num_channels(channels)
+        self.channels = [pygame.mixer.Channel(i) for i in range(channels)]
+        self.owners = [None] * channels  # (категория, приоритет, время запуска) по каналам
+        self.last_played = {}  # звук -> время последнего запуска (для ограничения частоты)
+        self.dropped = 0  # Сколько запусков отброшено (лимиты, частота, нет каналов)
+
+    def effect(self, path, category=None):
+        """Эффект по пути файла; категория по умолчанию — из манифеста."""
+        category = category or assets.manifest_entry(path).get('category', DEFAULT_CATEGORY)
+        return SoundEffect(self, load_sound(path), category)
+
+    def play(self, sound, category):
+        spec = self.categories[category]
+        now = self.clock()
+
+        last = self.last_played.get(sound)
+        if last is not None and now - last < spec.min_interval:
+            self.dropped += 1
+            return None
+
+        index = self.pick_channel(category, spec)
+        if index is None:
+            self.dropped += 1
+            return None
+
+        channel = self.channels[index]
+        channel.play(sound)
+        self.owners[index] = (category, spec.priority, now)
+        self.last_played[sound] = now
+        return channel
+
+    def pick_channel(self, category, spec):
+        """Канал для нового звука категории или None, если звук играть не нужно."""
+        own, free, lower = [], None, []
+        for index, channel in enumerate(self.channels):
+            owner = self.owners[index]
+            if owner is None or not channel.get_busy():
+                if free is None:
+                    free = index
+                continue
+            if owner[0] == category:
+                own.append(index)
+            elif owner[1] < spec.priority:
+                lower.append(index)
+
+        def oldest(indices):
+            return min(indices, key=lambda i: self.owners[i][2])
+
+        if len(own) >= spec.voices:
+            return oldest(own)  # Лимит категории — заменяем её самый старый звук
+        if free is not None:
+            return free
+        if lower:
+            return oldest(lower)  # Вытесняем менее важный звук
+        return None
+
+
+class NullAudio:
+    """Звуковая система без звука: все эффекты — NullSound."""
+
+    def effect(self, path, category=None):
+        return NULL_SOUND
+
+    def play(self, sound, category):
+        return None
+
+
+_audio = None
+
+
+def get_audio():
+    """AudioSystem, если микшер инициализирован, иначе NullAudio."""
+    global _audio
+    if _audio is None or (isinstance(_audio, NullAudio) and pygame.mixer.get_init()):
+        _audio = AudioSystem() if pygame.mixer.get_init() else NullAudio()
+    return _audio
@@ -0,0 +1,325 @@
+"""
+Набор замеров производительности (запускается без окна, см. headless.py).
+
+Каждый сценарий готовит данные один раз, а затем замеряется его шаг
+(сценарии с изменяемым состоянием возвращают пару (prepare, step): prepare()
+перед каждым повтором строит свежее состояние вне замера):
+время (медиана, минимум, среднее по повторам) и выделения памяти за один
+шаг через tracemalloc (пик и число новых блоков). Результаты можно сохранить
+в JSON как базовую линию и сравнить с ней следующий прогон — сценарии,
+ставшие медленнее порога, помечаются как регрессии (код выхода 1).
+
+    python benchmark.py --save benchmarks/baseline.json
+    python benchmark.py --compare benchmarks/baseline.json
+    python benchmark.py --only enemy_chase_100 boss_barrage --repeat 50
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+import pygame
+
+import assets
+from ai_scheduler import AIScheduler
+from boss import Boss
+from controls import NO_INPUT
+from game import Game
+from headless import init_headless
+from level import Level
+from level_cache import read_level_file
+from settings import TICK_TIME, TILE_SIZE
+
+DEFAULT_THRESHOLD = 0.10  # Замедление больше чем на 10% считается регрессией
+
+
+# -------------------------------
+#   Генерация карт
+# -------------------------------
+def generate_map(cols, rows, wall_chance, enemies=0, seed=0):
+    """
+    Карта в формате файлов уровней: стены по краю и случайно внутри,
+    игрок в (1, 1), enemies врагов в случайных свободных клетках.
+    """
+    rng = random.Random(seed)
+    grid = [['1' if x in (0, cols - 1) or y in (0, rows - 1) or rng.random() < wall_chance else ' '
+             for x in range(cols)] for y in range(rows)]
+    grid[1][1] = 'P'
+    free = [(x, y) for y in range(1, rows - 1) for x in range(1, cols - 1) if grid[y][x] == ' ']
+    for x, y in rng.sample(free, min(enemies, len(free))):
+        grid[y][x] = 'E'
+    return [''.join(row) for row in grid]
+
+
+def open_cells(level):
+    return [(x, y) for y in range(level.rows) for x in range(level.cols) if not level.is_solid(x, y)]
+
+
+def fake_player(x, y):
+    """Минимальный «игрок» для сценариев, которым нужен только rect."""
+    return SimpleNamespace(rect=pygame.Rect(x, y, 25, 31), bullets=None)
+
+
+# -------------------------------
+#   Сценарии: setup() -> функция одного шага или (prepare, step)
+# -------------------------------
+def setup_parse_small():
+    data = read_level_file("levels/level1.txt")
+    return lambda: Level(data)
+
+
+def setup_parse_large():
+    data = generate_map(300, 300, 0.2, seed=1)
+    return lambda: Level(data)
+
+
+def setup_build_path():
+    level = Level(generate_map(120, 120, 0.3, enemies=1, seed=2))
+    enemy = level.enemies[0]
+    rng = random.Random(2)
+    cells = open_cells(level)
+    pairs = [tuple((x * TILE_SIZE + TILE_SIZE // 2, y * TILE_SIZE + TILE_SIZE // 2)
+                   for x, y in rng.sample(cells, 2)) for _ in range(50)]
+
+    def run():
+        level.pathfinder.cache.clear()  # Замеряем поиск, а не кэш
+        for start, goal in pairs:
+            enemy.build_path(start, goal, level)
+    return run
+
+
+def setup_can_see():
+    level = Level(generate_map(120, 120, 0.3, enemies=1, seed=3))
+    enemy = level.enemies[0]
+    rng = random.Random(3)
+    samples = []
+    for x, y in rng.sample(open_cells(level), 500):
+        px = x * TILE_SIZE + rng.randint(-200, 200)
+        py = y * TILE_SIZE + rng.randint(-200, 200)
+        samples.append(((x * TILE_SIZE + 10, y * TILE_SIZE + 10), fake_player(px, py)))
+
+    def run():
+        level.visibility.results.clear()
+        for position, player in samples:
+            enemy.rect = position
+            enemy.can_see_player(player, level)
+    return run
+
+
+def setup_sprite_loading():
+    def run():
+        assets.clear_cache()
+        for path in ("src/sprites/enemy.png", "src/sprites/wizard_tiles.png"):
+            assets.load_sprite_frames(path, 32, 32)
+            assets.load_sprite_frames(path, 32, 32, flip=True)
+    return run
+
+
+def setup_enemy_chase():
+    data = generate_map(60, 40, 0.05, enemies=100, seed=4)
+    player = fake_player(30 * TILE_SIZE, 20 * TILE_SIZE)
+
+    def prepare():
+        level = Level(data)  # Свежие пути, состояния и поле путей на каждый повтор
+        pool = level.enemy_pool
+        for index in range(pool.count):
+            pool.detect_radius[index] = 10000  # Все видят игрока и гонятся
+        level.flow_field.update(player.rect.center)  # Общее поле путей — не часть шага врагов
+        return level
+
+    def step(level):
+        level.enemy_pool.update(player, level, TICK_TIME)
+    return prepare, step
+
+
+def setup_enemy_swarm(scheduled):
+    """
+    400 врагов на большой карте, игрок в центре, около пятой части врагов в радиусе
+    обнаружения; scheduled — через планировщик ИИ (бюджет и редкие тики дальних).
+    """
+    data = generate_map(120, 80, 0.1, enemies=400, seed=5)
+    player = fake_player(60 * TILE_SIZE, 40 * TILE_SIZE)
+
+    def prepare():
+        # Свежие уровень, пул и планировщик: оба варианта замеряют один и тот же первый тик
+        level = Level(data)
+        pool = level.enemy_pool
+        for index in range(pool.count):
+            pool.detect_radius[index] = 1200
+        level.flow_field.update(player.rect.center)  # Общее поле путей — не часть шага врагов
+        return level, AIScheduler() if scheduled else None
+
+    def step(state):
+        level, scheduler = state
+        level.enemy_pool.update(player, level, TICK_TIME, scheduler)
+    return prepare, step
+
+
+def setup_boss_barrage(pattern=None):
+    """120 тиков финальной стадии из центра арены; pattern — шаблон залпа вместо стандартного."""
+    game = Game(["levels/level2.txt"])
+    boss = next(enemy for enemy in game.enemies if isinstance(enemy, Boss))
+    player = game.player
+    boss.state = Boss.STATE_FINAL_BARRAGE
+    if pattern:
+        boss.state_patterns[Boss.STATE_FINAL_BARRAGE] = pattern
+    boss.rect.center = boss.center_target
+    ticks = 120
+
+    def run():
+        boss.bullets.clear()
+        player.invincible, player.invincible_timer = True, 10 ** 9
+        current_time = boss.final_barrage_start_time
+        for _ in range(ticks):
+            current_time += TICK_TIME
+            boss.final_barrage_start_time = current_time  # Не даём перейти в FINAL_CHAOS
+            boss.update(player, game.level, TICK_TIME, current_time)
+    return run
+
+
+def setup_game_frame():
+    game = Game()
+    screen = pygame.display.set_mode((game.level.width, game.level.height))
+
+    def run():
+        # Тот же порядок, что в кадре main_game: тик логики, отрисовка, flip
+        game.step(NO_INPUT, TICK_TIME)
+        game.level.draw(screen)
+        game.player.draw(screen)
+        game.player.draw_bullets(screen)
+        for enemy in game.enemies:
+            enemy.draw(screen)
+        pygame.display.flip()
+    return run
+
+
+SCENARIOS = {
+    'parse_level_small': (setup_parse_small, 200),
+    'parse_level_large': (setup_parse_large, 5),
+    'build_path_dense': (setup_build_path, 10),
+    'can_see_player_dense': (setup_can_see, 20),
+    'sprite_sheet_loading': (setup_sprite_loading, 20),
+    'enemy_chase_100': (setup_enemy_chase, 100),
+    'enemy_swarm_400': (lambda: setup_enemy_swarm(False), 50),
+    'enemy_swarm_400_scheduled': (lambda: setup_enemy_swarm(True), 50),  # Бюджет и LOD (ai_scheduler.py)
+    'boss_barrage': (setup_boss_barrage, 10),
+    'boss_barrage_ring': (lambda: setup_boss_barrage('ring'), 10),  # Плотный «шторм» по 16 пуль за залп
+    'game_frame': (setup_game_frame, 300),
+}
+
+
+# -------------------------------
+#   Замеры
+# -------------------------------
+def measure(run, repeat):
+    """
+    Время шага (мс) по repeat повторам и выделения памяти за один шаг.
+    run — функция шага или пара (prepare, step): prepare() вызывается перед каждым шагом вне замера.
+    """
+    if isinstance(run, tuple):
+        prepare, step = run
+    else:
+        prepare, step = (lambda: None), (lambda state: run())
+
+    step(prepare())  # Прогрев
+    times = []
+    for _ in range(repeat):
+        state = prepare()
+        started = time.perf_counter()
+        step(state)
+        times.append((time.perf_counter() - started) * 1000)
+
+    state = prepare()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    base, _ = tracemalloc.get_traced_memory()
+    step(state)
+    _, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, 'filename') if stat.count_diff > 0)
+
+    return {
+        'median_ms': statistics.median(times),
+        'min_ms': min(times),
+        'mean_ms': statistics.fmean(times),
+        'repeat': repeat,
+        'alloc_peak_kb': (peak - base) / 1024,
+        'alloc_blocks': blocks,
+    }
+
+
+def run_benchmarks(names=None, repeat=None):
+    init_headless()
+    results = {}
+    for name, (setup, default_repeat) in SCENARIOS.items():
+        if names and name not in names:
+            continue
+        results[name] = measure(setup(), repeat or default_repeat)
+        print(f"{name:24} {results[name]['median_ms']:10.3f} мс  (мин {results[name]['min_ms']:.3f}, "
+              f"пик {results[name]['alloc_peak_kb']:.1f} КБ, блоков {results[name]['alloc_blocks']})")
+    return results
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """Сравнение с базовой линией. Возвращает список регрессий (имя, было, стало)."""
+    regressions = []
+    print(f"\nСравнение с базовой линией (порог {threshold:.0%}):")
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            print(f"  {name:24} нет в базовой линии")
+            continue
+        ratio = current['median_ms'] / previous['median_ms'] if previous['median_ms'] else 1.0
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  <-- РЕГРЕССИЯ"
+            regressions.append((name, previous['median_ms'], current['median_ms']))
+        print(f"  {name:24} {previous['median_ms']:10.3f} -> {current['median_ms']:10.3f} мс ({ratio - 1:+.1%}){flag}")
+    return regressions
+
+
+def save_results(path, results):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    data = {
+        'meta': {
+            'python': platform.python_version(),
+            'pygame': pygame.version.ver,
+            'platform': platform.platform(),
+            'time': time.strftime("%Y-%m-%d %H:%M:%S"),
+        },
+        'scenarios': results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
+
+def load_results(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)['scenarios']
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Замеры производительности")
+    parser.add_argument("--only", nargs="+", choices=sorted(SCENARIOS), help="запустить только эти сценарии")
+    parser.add_argument("--repeat", type=int, help="число повторов (по умолчанию — своё у каждого сценария)")
+    parser.add_argument("--save", help="сохранить результаты в JSON")
+    parser.add_argument("--compare", help="сравнить с сохранённым JSON")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="допустимое замедление (доля)")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.only, args.repeat)
+    if args.save:
+        save_results(args.save, results)
+    if args.compare:
+        if compare(results, load_results(args.compare), args.threshold):
+            sys.exit(1)
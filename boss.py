@@ -3,15 +3,31 @@ import pygame
 import math
 import random
 
+from bullet_patterns import compile_patterns
+from projectiles import ProjectileSystem
+from renderer import lerp_position
+
+# Шаблоны залпов компилируются один раз на процесс
+COMPILED_PATTERNS = compile_patterns()
+
+
 class Boss:
     STATE_NORMAL = 0
     STATE_FINAL_BARRAGE = 1
     STATE_FINAL_CHAOS = 2
 
-    def __init__(self, x, y, tile_size, arena_width=950, arena_height=500):
+    # Какой шаблон залпа (см. bullet_patterns.PATTERNS) использует каждая стадия
+    STATE_PATTERNS = {
+        STATE_FINAL_BARRAGE: 'random_spray',
+        STATE_FINAL_CHAOS: 'random_spray',
+    }
+
+    def __init__(self, x, y, tile_size, arena_width=950, arena_height=500, rng=None):
         width = tile_size * 2
         height = tile_size * 2
         self.rect = pygame.Rect(x, y, width, height)
+        self.rng = rng or random.Random()  # Свой поток случайных чисел (движение и залпы)
+        self.previous_pos = self.rect.topleft  # Позиция на прошлом тике (для интерполяции)
 
         self.arena_width = arena_width
         self.arena_height = arena_height
@@ -21,7 +37,8 @@ class Boss:
         self.health = self.max_health
         self.is_dead = False
 
-        self.bullets = []
+        # Пули босса: исчезают о стены и далеко за пределами арены
+        self.bullets = ProjectileSystem(2048, bounds=(-50, -50, 2000, 2000))
         self.shoot_cooldown = 1000
         self.last_shot_time = 0
         self.detect_radius = 300
@@ -29,7 +46,7 @@ class Boss:
 
         # Параметры движения
         self.speed = 2.0
-        angle = random.random() * 2 * math.pi
+        angle = self.rng.random() * 2 * math.pi
         self.velocity = pygame.Vector2(math.cos(angle), math.sin(angle)) * self.speed
 
         self.change_dir_cooldown = 3000
@@ -43,7 +60,9 @@ class Boss:
         self.state = self.STATE_NORMAL
 
         # ------- FINAL_BARRAGE -------
-        self.barrage_shoot_interval = 50  # мс между пулями в финальной/хаотичной стадии
+        self.barrage_shoot_interval = 50  # мс между залпами в финальной/хаотичной стадии
+        self.state_patterns = dict(self.STATE_PATTERNS)  # Можно переопределить для конкретного босса
+        self.pattern_tick = 0  # Номер залпа (для вращающихся и волновых шаблонов)
         self.last_barrage_shot_time = 0
         self.center_target = (arena_width // 2, arena_height // 2)
 
@@ -55,7 +74,12 @@ class Boss:
         # Тут босс игнорирует стены и двигается хаотично, продолжая стрелять
         # Можно завести флаги/таймеры, но пока оставим бесконечно.
 
-    def update(self, player, walls, delta_time, current_time):
+    def save_state(self):
+        """Запоминает позиции босса и его пуль перед тиком симуляции."""
+        self.previous_pos = self.rect.topleft
+        self.bullets.save_positions()
+
+    def update(self, player, level, delta_time, current_time):
         """Главная логика босса, вызывается каждый кадр."""
         if self.is_dead:
 
@@ -73,21 +97,21 @@ class Boss:
 
         # Вызываем соответствующий метод обновления
         if self.state == self.STATE_NORMAL:
-            self.update_normal(player, walls, delta_time, current_time)
+            self.update_normal(player, level, delta_time, current_time)
         elif self.state == self.STATE_FINAL_BARRAGE:
             self.update_final_barrage(player, delta_time, current_time)
         elif self.state == self.STATE_FINAL_CHAOS:
             self.update_final_chaos(player, delta_time, current_time)
 
         # Обновляем пули
-        self.update_bullets(walls, player)
+        self.update_bullets(level, player)
 
     # -----------------------------
     # 1) NORMAL
     # -----------------------------
-    def update_normal(self, player, walls, delta_time, current_time):
+    def update_normal(self, player, level, delta_time, current_time):
         # Двигаемся и уклоняемся
-        self.move_around(walls, delta_time, current_time, player)
+        self.move_around(level, delta_time, current_time, player)
         # Стреляем в игрока, если видим
         distance = pygame.Vector2(self.rect.center).distance_to(player.rect.center)
         if distance < self.detect_radius and self.shots_left > 0:
@@ -102,7 +126,8 @@ class Boss:
     # -----------------------------
     def update_final_barrage(self, player, delta_time, current_time):
         """
-        Босс идёт в центр, стоит на месте и спамит пули в случайных направлениях.
+        Босс идёт в центр, стоит на месте и спамит пули по шаблону стадии
+        (по умолчанию — в случайных направлениях).
         Игнорируем уклонение, не трогаем стены.
         """
         center_pos = pygame.Vector2(self.center_target)
@@ -119,7 +144,7 @@ class Boss:
         else:
             # На центре. Спамим пули
             if current_time - self.last_barrage_shot_time >= self.barrage_shoot_interval:
-                self.shoot_random_bullet()
+                self.fire_pattern(player)
                 self.last_barrage_shot_time = current_time
 
     # -----------------------------
@@ -151,7 +176,7 @@ class Boss:
 
         # 3) Спам пуль
         if current_time - self.last_barrage_shot_time >= self.barrage_shoot_interval:
-            self.shoot_random_bullet()
+            self.fire_pattern(player)
             self.last_barrage_shot_time = current_time
 
     # -----------------------------
@@ -162,71 +187,40 @@ class Boss:
         if direction.length_squared() > 0:
             direction = direction.normalize()
         bullet_speed = 7
+        self.bullets.spawn(self.rect.centerx, self.rect.centery, direction.x, direction.y, bullet_speed)
 
-        bullet_rect = pygame.Rect(self.rect.centerx, self.rect.centery, 10, 10)
-        bullet = {
-            'rect': bullet_rect,
-            'direction': direction,
-            'speed': bullet_speed
-        }
-        self.bullets.append(bullet)
-
-    def shoot_random_bullet(self):
-        """Стреляет пулей в случайную сторону из центра босса."""
-        angle = random.uniform(0, 2 * math.pi)
-        direction = pygame.Vector2(math.cos(angle), math.sin(angle))
-        bullet_speed = 6
-
-        bullet_rect = pygame.Rect(self.rect.centerx, self.rect.centery, 10, 10)
-        bullet = {
-            'rect': bullet_rect,
-            'direction': direction,
-            'speed': bullet_speed
-        }
-        self.bullets.append(bullet)
+    def fire_pattern(self, player):
+        """Выпускает залп по шаблону текущей стадии одним вызовом spawn_many."""
+        pattern = COMPILED_PATTERNS[self.state_patterns[self.state]]
+        aim = math.atan2(player.rect.centery - self.rect.centery, player.rect.centerx - self.rect.centerx)
+        directions = pattern.volley(self.pattern_tick, aim, self.rng)
+        self.bullets.spawn_many(self.rect.centerx, self.rect.centery, directions, pattern.speed)
+        self.pattern_tick += 1
 
     # -----------------------------
     #   Обновление пуль
     # -----------------------------
-    def update_bullets(self, walls, player):
-        bullets_to_remove = []
-        for bullet in self.bullets:
-            # Движение пули
-            bullet['rect'].x += bullet['direction'].x * bullet['speed']
-            bullet['rect'].y += bullet['direction'].y * bullet['speed']
-
-
-# Столкновение со стенами (кроме финального хаоса —
-            # но тут пули всё равно можно уничтожать о стены)
-            for wall in walls:
-                if bullet['rect'].colliderect(wall):
-                    bullets_to_remove.append(bullet)
-                    break
-
-            # Попадание в игрока
-            if bullet['rect'].colliderect(player.rect):
-                if not player.invincible:
-                    player.lives -= 1
-                    player.invincible = True
-                    player.invincible_timer = player.invincible_time
-                    if player.lives <= 0:
-                        player.die()
-                bullets_to_remove.append(bullet)
-                continue
-
-            # Если вышли за границы
-            if (bullet['rect'].x < -50 or bullet['rect'].x > 2000 or
-                bullet['rect'].y < -50 or bullet['rect'].y > 2000):
-                bullets_to_remove.append(bullet)
-
-        for b in bullets_to_remove:
-            if b in self.bullets:
-                self.bullets.remove(b)
+    def update_bullets(self, level, player):
+        self.bullets.advance()
+
+        # Попадание в игрока
+        for slot, _ in self.bullets.hits([player.rect]):
+            if not player.invincible:
+                player.lives -= 1
+                player.invincible = True
+                player.invincible_timer = player.invincible_time
+                if player.lives <= 0:
+                    player.die()
+            self.bullets.kill(slot)
+
+        # Столкновение со стенами (кроме финального хаоса —
+        # но тут пули всё равно можно уничтожать о стены) и выход за границы
+        self.bullets.resolve(level)
 
     # -----------------------------
     #   ДВИЖЕНИЕ + УВОРОТ (NORMAL)
     # -----------------------------
-    def move_around(self, walls, delta_time, current_time, player):
+    def move_around(self, level, delta_time, current_time, player):
         # Меняем направление раз в 3 секунды
         if current_time - self.last_change_dir_time > self.change_dir_cooldown:
             self.change_direction()
@@ -240,40 +234,36 @@ class Boss:
         old_rect = self.rect.copy()
 
         self.rect.x += movement.x
-        self.check_collision_x(walls, old_rect)
+        self.check_collision_x(level, old_rect)
         self.rect.y += movement.y
-        self.check_collision_y(walls, old_rect)
+        self.check_collision_y(level, old_rect)
 
     def change_direction(self):
-        angle = random.random() * 2 * math.pi
+        angle = self.rng.random() * 2 * math.pi
         self.velocity = pygame.Vector2(math.cos(angle), math.sin(angle)) * self.speed
 
     def dodge_bullets(self, player):
         if not hasattr(player, 'bullets'):
             return
-        for b in player.bullets:
-            dist = pygame.Vector2(self.rect.center).distance_to(b['rect'].center)
+        for center in player.bullets.centers():
+            dist = pygame.Vector2(self.rect.center).distance_to(center)
             if dist < self.dodge_radius:
-                away = pygame.Vector2(self.rect.center) - pygame.Vector2(b['rect'].center)
+                away = pygame.Vector2(self.rect.center) - pygame.Vector2(center)
                 if away.length_squared() > 0:
                     away = away.normalize() * self.dodge_strength
                     self.velocity += away * 1.5
                 if self.velocity.length() > self.speed * 2.5:
                     self.velocity = self.velocity.normalize() * (self.speed * 2.5)
 
-    def check_collision_x(self, walls, old_rect):
-        for wall in walls:
-            if self.rect.colliderect(wall):
-                self.rect.x = old_rect.x
-                self.velocity.x *= -1
-                break
+    def check_collision_x(self, level, old_rect):
+        if level.collides_with_wall(self.rect):
+            self.rect.x = old_rect.x
+            self.velocity.x *= -1
 
-    def check_collision_y(self, walls, old_rect):
-        for wall in walls:
-            if self.rect.colliderect(wall):
-                self.rect.y = old_rect.y
-                self.velocity.y *= -1
-                break
+    def check_collision_y(self, level, old_rect):
+        if level.collides_with_wall(self.rect):
+            self.rect.y = old_rect.y
+            self.velocity.y *= -1
 
     # -----------------------------
     #   ЗДОРОВЬЕ
@@ -287,19 +277,34 @@ class Boss:
     # -----------------------------
     #   РИСОВАНИЕ
     # -----------------------------
-    def draw(self, screen):
-        if not self.is_dead:
-            pygame.draw.rect(screen, (200, 0, 0), self.rect)
-            self.draw_health_bar(screen)
-        for bullet in self.bullets:
-            pygame.draw.rect(screen, (0, 0, 0), bullet['rect'])
+    def draw_rect(self, alpha=1.0):
+        """Прямоугольник босса для отрисовки между прошлым и текущим тиком."""
+        return pygame.Rect(lerp_position(self.previous_pos, self.rect.topleft, alpha), self.rect.size)
 
-    def draw_health_bar(self, screen):
-        bar_width = self.rect.width
+    def draw(self, screen, alpha=1.0):
+        if not self.is_dead:
+            rect = self.draw_rect(alpha)
+            pygame.draw.rect(screen, (200, 0, 0), rect)
+            self.draw_health_bar(screen, rect)
+        self.bullets.draw(screen, (0, 0, 0), alpha)
+
+    def draw_health_bar(self, screen, rect=None):
+        rect = rect or self.rect
+        bar_width = rect.width
         bar_height = 8
-        bar_x = self.rect.x
-        bar_y = self.rect.y - bar_height - 5
+        bar_x = rect.x
+        bar_y = rect.y - bar_height - 5
         pygame.draw.rect(screen, (0, 0, 0), (bar_x, bar_y, bar_width, bar_height))
         health_ratio = self.health / self.max_health
         current_width = int(bar_width * health_ratio)
-        pygame.draw.rect(screen, (0, 200, 0), (bar_x, bar_y, current_width, bar_height))
\ No newline at end of file
+        pygame.draw.rect(screen, (0, 200, 0), (bar_x, bar_y, current_width, bar_height))
+
+    def get_draw_rects(self, alpha=1.0):
+        """Прямоугольники экрана, которые затрагивает draw (тело, полоска здоровья, пули)."""
+        rects = self.bullets.rects(alpha)
+        if not self.is_dead:
+            rect = self.draw_rect(alpha)
+            rects.append(rect)
+            # Полоска здоровья над боссом
+            rects.append(pygame.Rect(rect.x, rect.y - 13, rect.width, 8))
+        return rects
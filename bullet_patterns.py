@@ -0,0 +1,121 @@
+"""
+Шаблоны залпов босса, описанные данными.
+
+Шаблон — словарь (как PATTERNS ниже). compile_pattern заранее считает таблицы
+направлений для всех тиков цикла, так что во время боя залп — это выбор готового
+массива направлений n x 2 (для прицельных шаблонов — его поворот к игроку одной
+операцией над массивом) и один вызов ProjectileSystem.spawn_many.
+
+Виды шаблонов:
+    ring    — count пуль по кругу; rotation — поворот круга на каждом залпе (градусы),
+              с небольшим count и rotation получается спираль; если угол между пулями
+              не кратен rotation, направления считаются при каждом залпе
+    fan     — веер из count пуль шириной spread градусов, нацеленный на игрока
+    wave    — count пуль, направление которых качается на amplitude градусов
+              с периодом period залпов; без aimed пули идут по кругу, с aimed —
+              веером шириной spread градусов относительно направления на игрока
+    random  — count пуль в случайных направлениях
+"""
+import math
+import random
+
+import numpy as np
+
+PATTERNS = {
+    'random_spray': {'kind': 'random', 'count': 1, 'speed': 6},
+    'ring': {'kind': 'ring', 'count': 16, 'speed': 5},
+    'spiral': {'kind': 'ring', 'count': 3, 'rotation': 12, 'speed': 5},
+    'double_spiral': {'kind': 'ring', 'count': 6, 'rotation': -9, 'speed': 4},
+    'aimed_fan': {'kind': 'fan', 'count': 5, 'spread': 40, 'speed': 7},
+    'wave': {'kind': 'wave', 'count': 3, 'amplitude': 45, 'period': 24, 'aimed': True, 'speed': 6},
+}
+
+MAX_CYCLE = 360  # Ограничение длины предвычисленного цикла (в залпах)
+
+
+def _directions(angles):
+    """Массив направлений n x 2 (синусы и косинусы — из math, как и раньше)."""
+    return np.array([(math.cos(angle), math.sin(angle)) for angle in angles], dtype=np.float64).reshape(-1, 2)
+
+
+class CompiledPattern:
+    """Шаблон с предвычисленными направлениями залпов для каждого тика цикла."""
+
+    def __init__(self, kind, speed, volleys, aimed, count=0, base=None, rotation=0.0):
+        self.kind = kind
+        self.speed = speed
+        self.volleys = volleys  # Список залпов по тикам; залп — массив n x 2 (dx, dy); None — считать на лету
+        self.aimed = aimed  # Поворачивать ли залп в сторону цели
+        self.count = count
+        self.base = base  # Углы пуль первого залпа (для залпов, считаемых на лету)
+        self.rotation = rotation  # Поворот на каждом залпе, радианы
+
+    def volley(self, tick, aim_angle=0.0, rng=random):
+        """Направления пуль для залпа номер tick: массив n x 2."""
+        if self.kind == 'random':
+            return _directions(rng.uniform(0, 2 * math.pi) for _ in range(self.count))
+        if self.volleys is None:
+            turn = self.rotation * tick
+            directions = _directions(angle + turn for angle in self.base)
+        else:
+            directions = self.volleys[tick % len(self.volleys)]
+        if not self.aimed:
+            return directions
+        # Поворот заранее посчитанных направлений на угол прицеливания
+        cos_a, sin_a = math.cos(aim_angle), math.sin(aim_angle)
+        dx, dy = directions[:, 0], directions[:, 1]
+        return np.stack((dx * cos_a - dy * sin_a, dx * sin_a + dy * cos_a), axis=1)
+
+
+def compile_pattern(spec):
+    """Превращает описание шаблона (словарь) в CompiledPattern."""
+    kind = spec['kind']
+    count = spec.get('count', 1)
+    speed = spec.get('speed', 6)
+
+    if kind == 'random':
+        return CompiledPattern(kind, speed, [], aimed=False, count=count)
+
+    if kind == 'ring':
+        rotation_degrees = spec.get('rotation', 0)
+        rotation = math.radians(rotation_degrees)
+        base = [2 * math.pi * i / count for i in range(count)]
+        # Цикл закончится, когда круг повернётся ровно на угол между соседними пулями
+        if rotation_degrees == 0:
+            cycle = 1
+        else:
+            steps = (360 / count) / abs(rotation_degrees)
+            cycle = round(steps)
+            if abs(steps - cycle) > 1e-9 or not 1 <= cycle <= MAX_CYCLE:
+                # Угол между пулями не кратен повороту — без таблицы, иначе спираль «прыгает»
+                return CompiledPattern(kind, speed, None, aimed=False, count=count, base=base, rotation=rotation)
+        volleys = [_directions(angle + rotation * tick for angle in base) for tick in range(cycle)]
+        return CompiledPattern(kind, speed, volleys, aimed=False, count=count)
+
+    if kind == 'fan':
+        spread = math.radians(spec.get('spread', 30))
+        offsets = [0.0] if count == 1 else [-spread / 2 + spread * i / (count - 1) for i in range(count)]
+        return CompiledPattern(kind, speed, [_directions(offsets)], aimed=True, count=count)
+
+    if kind == 'wave':
+        amplitude = math.radians(spec.get('amplitude', 30))
+        period = max(1, min(MAX_CYCLE, spec.get('period', 20)))
+        aimed = spec.get('aimed', False)
+        if aimed:
+            # Веер вокруг направления на игрока, как у 'fan'
+            spread = math.radians(spec.get('spread', 30))
+            offsets = [0.0] if count == 1 else [-spread / 2 + spread * i / (count - 1) for i in range(count)]
+        else:
+            offsets = [2 * math.pi * i / count for i in range(count)]
+        volleys = []
+        for tick in range(period):
+            swing = amplitude * math.sin(2 * math.pi * tick / period)
+            volleys.append(_directions(swing + offset for offset in offsets))
+        return CompiledPattern(kind, speed, volleys, aimed=aimed, count=count)
+
+    raise ValueError(f"Неизвестный вид шаблона: {kind}")
+
+
+def compile_patterns(specs=None):
+    """Компилирует словарь шаблонов (по умолчанию PATTERNS) один раз."""
+    return {name: compile_pattern(spec) for name, spec in (specs or PATTERNS).items()}
@@ -0,0 +1,42 @@
+"""
+Состояние управления игроком за один кадр.
+
+Player.move читает не клавиатуру напрямую, а Controls: в обычной игре оно
+собирается из pygame.key.get_pressed(), в headless-режиме — из сценария
+или программы (бота).
+"""
+from collections import namedtuple
+
+import pygame
+
+# Биты для компактной записи (см. replay.py)
+BIT_UP = 1
+BIT_DOWN = 2
+BIT_LEFT = 4
+BIT_RIGHT = 8
+BIT_SHOOT = 16
+
+
+class Controls(namedtuple("Controls", "up down left right shoot", defaults=(False,) * 5)):
+    __slots__ = ()
+
+    @classmethod
+    def from_keys(cls, keys, shoot=False):
+        """Controls из состояния клавиш (WASD или стрелки)."""
+        return cls(up=bool(keys[pygame.K_w] or keys[pygame.K_UP]),
+                   down=bool(keys[pygame.K_s] or keys[pygame.K_DOWN]),
+                   left=bool(keys[pygame.K_a] or keys[pygame.K_LEFT]),
+                   right=bool(keys[pygame.K_d] or keys[pygame.K_RIGHT]),
+                   shoot=shoot)
+
+    @classmethod
+    def from_mask(cls, mask):
+        return cls(up=bool(mask & BIT_UP), down=bool(mask & BIT_DOWN), left=bool(mask & BIT_LEFT),
+                   right=bool(mask & BIT_RIGHT), shoot=bool(mask & BIT_SHOOT))
+
+    def to_mask(self):
+        return ((BIT_UP if self.up else 0) | (BIT_DOWN if self.down else 0) | (BIT_LEFT if self.left else 0)
+                | (BIT_RIGHT if self.right else 0) | (BIT_SHOOT if self.shoot else 0))
+
+
+NO_INPUT = Controls()  # Ничего не нажато
@@ -0,0 +1,447 @@
+"""
+Пул обычных врагов в виде «структуры массивов».
+
+Состояние всех врагов уровня (позиции, направления, состояния ИИ, кадры анимации,
+пути и точки патрулирования) хранится в массивах NumPy, а не в отдельных объектах.
+EnemyPool.update продвигает врагов операциями над целыми столбцами: таймеры
+анимаций, восприятие и переходы состояний, шаг к цели и проверка стен по сетке
+тайлов считаются масками сразу для всех. Поштучно остаются только построение
+путей A* (когда путь кончился) и проверка видимости — по разу на клетку, которой
+ещё нет в кэше видимости, а не на врага.
+Объекты Enemy остаются тонкими «представлениями» над своей строкой пула.
+
+Обновление врага делится на «мышление» (think: восприятие и переходы состояний,
+построение путей) и движение (move: шаг по текущему плану). С планировщиком
+(см. ai_scheduler.py) мышление получают не все враги каждый тик, а двигаются —
+все, поэтому между «мыслями» враг идёт по уже выбранному пути плавно.
+Методы обновления принимают массив индексов врагов.
+"""
+import math
+
+import numpy as np
+
+from renderer import lerp_position
+from settings import TILE_SIZE
+
+# Состояния ИИ
+STATE_IDLE = 0
+STATE_PATROL = 1
+STATE_CHASE = 2  # Видит игрока и идёт по общему полю путей
+STATE_SEARCH = 3  # Потерял игрока и идёт к последней известной позиции
+
+# Индексы анимаций
+ANIMATION_IDLE = 0
+ANIMATION_WALK = 1
+ANIMATION_RUN = 2
+
+# Анимация для каждого состояния ИИ (индекс — состояние)
+STATE_ANIMATIONS = np.array((ANIMATION_IDLE, ANIMATION_WALK, ANIMATION_RUN, ANIMATION_RUN), dtype=np.int8)
+
+ENEMY_SIZE = 30  # Размер прямоугольника врага
+HALF_SIZE = ENEMY_SIZE // 2
+REACH_DISTANCE = 5  # Насколько близко нужно подойти к точке пути
+
+# Столбцы пула: имя -> тип элемента
+COLUMNS = (
+    # Позиция левого верхнего угла прямоугольника врага (дробная)
+    ('x', np.float64), ('y', np.float64),
+    # Позиция на прошлом тике (для интерполяции при отрисовке)
+    ('prev_x', np.float64), ('prev_y', np.float64),
+    # Последнее направление движения
+    ('dir_x', np.float64), ('dir_y', np.float64),
+    ('speed', np.float64), ('detect_radius', np.float64),
+    ('state', np.int8), ('facing_right', np.int8),
+    # Последняя известная позиция игрока (has_target = 0 — нет)
+    ('has_target', np.int8), ('target_x', np.float64), ('target_y', np.float64),
+    # Анимация
+    ('animation', np.int8), ('frame', np.int16), ('frame_timer', np.float64), ('animation_speed', np.float64),
+    # Курсоры путей и патрулирования
+    ('path_index', np.int32), ('path_length', np.int32), ('patrol_index', np.int32), ('patrol_count', np.int32),
+    # Планировщик ИИ: тик последнего мышления и запрос нового пути (путь кончился между «мыслями»)
+    ('think_tick', np.int64), ('replan', np.int8),
+)
+# Таблицы переменной ширины (строка на врага): имя -> тип элемента
+TABLES = (
+    ('path_x', np.int32), ('path_y', np.int32),  # Узлы пути (центры клеток)
+    ('patrol_x', np.float64), ('patrol_y', np.float64),  # Точки патрулирования
+    ('frame_counts', np.int32),  # Кол-во кадров в каждой анимации (для зацикливания)
+)
+
+
+def tile_center(tx, ty):
+    return (tx * TILE_SIZE + TILE_SIZE // 2, ty * TILE_SIZE + TILE_SIZE // 2)
+
+
+def build_path(level, start_pos, end_pos):
+    """
+    Путь по центрам клеток от start_pos до end_pos (в пикселях) через A* уровня.
+    Если путь не найден или мы уже в нужной клетке — пустой список.
+    """
+    start_tile = (int(start_pos[0] // TILE_SIZE), int(start_pos[1] // TILE_SIZE))
+    end_tile = (int(end_pos[0] // TILE_SIZE), int(end_pos[1] // TILE_SIZE))
+    if start_tile == end_tile:
+        return []  # Уже там
+    return [tile_center(tx, ty) for tx, ty in level.pathfinder.find_path(start_tile, end_tile)]
+
+
+def plan_mask(plan, count):
+    """plan из move/go_to (флаг для всех или маска по врагам) в виде маски."""
+    if isinstance(plan, np.ndarray):
+        return plan
+    return np.full(count, bool(plan))
+
+
+class EnemyPool:
+    def __init__(self, capacity=16):
+        self.count = 0
+        self.capacity = capacity
+        for name, dtype in COLUMNS:
+            setattr(self, name, np.zeros(capacity, dtype=dtype))
+        for name, dtype in TABLES:
+            setattr(self, name, np.zeros((capacity, 1), dtype=dtype))
+        self.views = []  # Объекты Enemy по индексам
+
+    # -------------------------------
+    #   Добавление и удаление
+    # -------------------------------
+    def grow(self):
+        """Удваивает число строк во всех столбцах и таблицах."""
+        extra = self.capacity
+        for name, _ in COLUMNS + TABLES:
+            column = getattr(self, name)
+            setattr(self, name, np.concatenate((column, np.zeros((extra,) + column.shape[1:], column.dtype))))
+        self.capacity += extra
+
+    def widen(self, name, width):
+        """Расширяет таблицу name хотя бы до width элементов в строке."""
+        table = getattr(self, name)
+        if table.shape[1] < width:
+            wider = np.zeros((self.capacity, max(width, table.shape[1] * 2)), dtype=table.dtype)
+            wider[:, :table.shape[1]] = table
+            setattr(self, name, wider)
+
+    def add(self, view, x, y, speed, facing_right, animations, patrol_points):
+        """Добавляет врага и возвращает его индекс в пуле."""
+        if self.count == self.capacity:
+            self.grow()
+        index = self.count
+        for name, _ in COLUMNS:
+            getattr(self, name)[index] = 0
+        self.x[index] = self.prev_x[index] = x
+        self.y[index] = self.prev_y[index] = y
+        self.speed[index] = speed
+        self.detect_radius[index] = 250  # Радиус обнаружения игрока
+        self.state[index] = STATE_IDLE
+        self.facing_right[index] = 1 if facing_right else 0
+        self.animation[index] = ANIMATION_IDLE
+        self.animation_speed[index] = 150  # мс на кадр
+
+        frame_counts = [len(frames) for frames in animations]
+        self.widen('frame_counts', len(frame_counts))
+        self.frame_counts[index, :len(frame_counts)] = frame_counts
+        self.set_patrol_points(index, patrol_points)
+
+        self.views.append(view)
+        self.count += 1
+        return index
+
+    def remove(self, index):
+        """Удаляет врага: на его место переносится последний."""
+        last = self.count - 1
+        for name, _ in COLUMNS + TABLES:
+            column = getattr(self, name)
+            column[index] = column[last]
+        self.views[index] = self.views[last]
+        self.views.pop()
+        if index != last:
+            self.views[index].index = index
+        self.count -= 1
+
+    # -------------------------------
+    #   Чтение одной строки
+    # -------------------------------
+    def path(self, index):
+        """Текущий путь врага: список центров клеток."""
+        length = self.path_length[index]
+        return list(zip(self.path_x[index, :length].tolist(), self.path_y[index, :length].tolist()))
+
+    def set_path(self, index, path):
+        self.widen('path_x', len(path))
+        self.widen('path_y', len(path))
+        for slot, (px, py) in enumerate(path):
+            self.path_x[index, slot] = px
+            self.path_y[index, slot] = py
+        self.path_length[index] = len(path)
+        self.path_index[index] = 0
+
+    def patrol_points(self, index):
+        count = self.patrol_count[index]
+        return list(zip(self.patrol_x[index, :count].tolist(), self.patrol_y[index, :count].tolist()))
+
+    def set_patrol_points(self, index, points):
+        self.widen('patrol_x', len(points))
+        self.widen('patrol_y', len(points))
+        for slot, (px, py) in enumerate(points):
+            self.patrol_x[index, slot] = px
+            self.patrol_y[index, slot] = py
+        self.patrol_count[index] = len(points)
+        self.patrol_index[index] = 0
+
+    def draw_position(self, index, alpha=1.0):
+        """Левый верхний угол врага для отрисовки между прошлым и текущим тиком."""
+        if alpha == 1.0:
+            return int(self.x[index]), int(self.y[index])
+        return lerp_position((self.prev_x[index], self.prev_y[index]), (self.x[index], self.y[index]), alpha)
+
+    # -------------------------------
+    #   Пакетное обновление
+    # -------------------------------
+    def save_positions(self):
+        """Запоминает текущие позиции всех врагов как позиции прошлого тика."""
+        count = self.count
+        self.prev_x[:count] = self.x[:count]
+        self.prev_y[:count] = self.y[:count]
+
+    def update(self, player, level, delta_time, scheduler=None):
+        """
+        Обновляет всех врагов пула. С scheduler (ai_scheduler.AIScheduler)
+        мыслят только выбранные им враги, остальные двигаются по текущему плану.
+        """
+        if self.count == 0:
+            return
+        # Общее поле путей к игроку пересчитается, только если игрок сменил клетку
+        level.flow_field.update(player.rect.center)
+        self.tick_animations(delta_time)
+        player_x, player_y = player.rect.center
+        if scheduler is not None:
+            scheduler.run(self, player_x, player_y, level)
+            return
+        self.think(np.arange(self.count), player_x, player_y, level)
+
+    def update_one(self, index, player, level, delta_time):
+        """Обновление одного врага (для совместимости с Enemy.update)."""
+        level.flow_field.update(player.rect.center)
+        self.tick_animations(delta_time, index, index + 1)
+        self.think(np.array([index]), player.rect.centerx, player.rect.centery, level)
+
+    def tick_animations(self, delta_time, start=0, stop=None):
+        """Таймеры кадров для диапазона врагов."""
+        rows = slice(start, self.count if stop is None else stop)
+        timers = self.frame_timer[rows] + delta_time
+        rolled = timers >= self.animation_speed[rows]
+        timers[rolled] = 0
+        self.frame_timer[rows] = timers
+        frames = self.frame[rows]  # Представление столбца: запись идёт прямо в пул
+        frames[rolled] += 1
+        # Зацикливаем
+        frame_counts = self.frame_counts[rows][np.arange(len(frames)), self.animation[rows]]
+        frames[rolled & (frames >= frame_counts)] = 0
+
+    def think(self, indices, player_x, player_y, level):
+        """
+        Восприятие, переход между состояниями (патруль / преследование / поиск) и движение
+        врагов indices. Возвращает маску тех, кому пришлось строить путь (для бюджета планировщика).
+        """
+        self.replan[indices] = 0
+        states, sees = self.perceive(indices, player_x, player_y, level)
+        self.apply_perception(indices, states, sees, player_x, player_y)
+        return self.move(indices, player_x, player_y, level)
+
+    def centers(self, indices):
+        """Целочисленные центры врагов (как int(x) + HALF_SIZE)."""
+        return (self.x[indices].astype(np.int64) + HALF_SIZE,
+                self.y[indices].astype(np.int64) + HALF_SIZE)
+
+    def perceive(self, indices, player_x, player_y, level):
+        """
+        Видит ли враг игрока и в какое состояние переходит — без записи в пул.
+        Возвращает (новые состояния, маска «видит игрока»).
+        """
+        cx, cy = self.centers(indices)
+        distance = np.hypot(player_x - cx, player_y - cy)
+        sees = (distance <= self.detect_radius[indices]) & (distance != 0)
+        if sees.any():
+            sees[sees] = self.visible(cx[sees] // TILE_SIZE, cy[sees] // TILE_SIZE,
+                                      (player_x // TILE_SIZE, player_y // TILE_SIZE), level)
+        states = self.state[indices]
+        # Игрока не видно: идём к последней известной позиции
+        searching = ~sees & ((states == STATE_CHASE) | (states == STATE_SEARCH)) & (self.has_target[indices] != 0)
+        patrolling = ~sees & ~searching & (self.patrol_count[indices] > 0)
+        # Нет точек патрулирования — враг просто стоит
+        states = np.where(sees, STATE_CHASE,
+                          np.where(searching, STATE_SEARCH, np.where(patrolling, STATE_PATROL, STATE_IDLE)))
+        return states.astype(np.int8), sees
+
+    def apply_perception(self, indices, states, sees, player_x, player_y):
+        """Записывает результат perceive: состояния, анимации и позицию замеченного игрока."""
+        self.state[indices] = states
+        seeing = indices[sees]
+        self.has_target[seeing] = 1
+        self.target_x[seeing] = player_x
+        self.target_y[seeing] = player_y
+        self.set_animation(indices, STATE_ANIMATIONS[states])
+
+    def goals(self, indices, states):
+        """
+        Цели врагов в состоянии поиска (последняя позиция игрока) и патруля
+        (текущая точка обхода): (goal_x, goal_y, маска «уже дошли»).
+        """
+        patrol_slots = self.patrol_index[indices] % np.maximum(self.patrol_count[indices], 1)
+        searching = states == STATE_SEARCH
+        goal_x = np.where(searching, self.target_x[indices], self.patrol_x[indices, patrol_slots])
+        goal_y = np.where(searching, self.target_y[indices], self.patrol_y[indices, patrol_slots])
+        cx, cy = self.centers(indices)
+        reached = np.hypot(goal_x - cx, goal_y - cy) < REACH_DISTANCE
+        return goal_x, goal_y, reached
+
+    def wants_path(self, indices, states):
+        """Маска врагов, которые на ближайшем шаге в состояниях states построят путь (без записи в пул)."""
+        result = np.zeros(len(indices), dtype=bool)
+        walking = (states == STATE_SEARCH) | (states == STATE_PATROL)
+        if walking.any():
+            walkers = indices[walking]
+            goal_x, goal_y, reached = self.goals(walkers, states[walking])
+            exhausted = self.path_index[walkers] >= self.path_length[walkers]
+            result[walking] = ~reached & exhausted & ~self.in_goal_tile(walkers, goal_x, goal_y)
+        return result
+
+    def move(self, indices, player_x, player_y, level, plan=True):
+        """
+        Шаг по текущему состоянию. plan=False (или маска по indices) — без построения путей:
+        если путь кончился, враг ждёт и просит планировщик (replan).
+        Возвращает маску врагов, для которых строился путь.
+        """
+        built = np.zeros(len(indices), dtype=bool)
+        plan = plan_mask(plan, len(indices))
+        states = self.state[indices]
+        chasing = states == STATE_CHASE
+        if chasing.any():
+            self.follow_flow_field(indices[chasing], player_x, player_y, level)
+
+        walking = (states == STATE_SEARCH) | (states == STATE_PATROL)
+        if walking.any():
+            walkers, walker_states = indices[walking], states[walking]
+            goal_x, goal_y, reached = self.goals(walkers, walker_states)
+            # Дошли до последней позиции игрока — забываем её
+            arrived = walkers[reached & (walker_states == STATE_SEARCH)]
+            self.has_target[arrived] = 0
+            self.state[arrived] = STATE_IDLE
+            # Дошли до точки патрулирования — следующая по кругу
+            arrived = walkers[reached & (walker_states == STATE_PATROL)]
+            self.patrol_index[arrived] = (self.patrol_index[arrived] + 1) % self.patrol_count[arrived]
+            self.path_length[arrived] = 0
+            going = ~reached
+            positions = np.flatnonzero(walking)[going]
+            built[positions] = self.go_to(walkers[going], goal_x[going], goal_y[going], level, plan[positions])
+        return built
+
+    # -------------------------------
+    #   Восприятие
+    # -------------------------------
+    def visible(self, tiles_x, tiles_y, player_tile, level):
+        """
+        Луч между клетками врагов и клеткой игрока (из кэша видимости уровня).
+        Кэш опрашивается по разу на клетку, даже если в ней стоят несколько врагов.
+        """
+        # Ключ клетки — номер в прямоугольнике, охватывающем клетки врагов (они могут быть и вне карты)
+        base_x = int(tiles_x.min())
+        width = int(tiles_x.max()) - base_x + 1
+        keys, inverse = np.unique(tiles_y * width + (tiles_x - base_x), return_inverse=True)
+        visible = level.visibility.visible
+        player_tile = (int(player_tile[0]), int(player_tile[1]))
+        results = np.array([visible((key % width + base_x, key // width), player_tile) for key in keys.tolist()],
+                           dtype=bool)
+        return results[inverse.ravel()]
+
+    def can_see(self, index, player_x, player_y, level):
+        """Радиус видимости и луч между клетками врага и игрока (один враг, без массивов)."""
+        cx = int(self.x[index]) + HALF_SIZE
+        cy = int(self.y[index]) + HALF_SIZE
+        distance = math.hypot(player_x - cx, player_y - cy)
+        if distance > self.detect_radius[index] or distance == 0:
+            return False
+        return level.visibility.visible((cx // TILE_SIZE, cy // TILE_SIZE),
+                                        (player_x // TILE_SIZE, player_y // TILE_SIZE))
+
+    # -------------------------------
+    #   Движение
+    # -------------------------------
+    def set_animation(self, indices, animations):
+        changed = self.animation[indices] != animations
+        self.frame[indices] = np.where(changed, 0, self.frame[indices])  # Сброс на первый кадр
+        self.animation[indices] = animations
+
+    def in_goal_tile(self, indices, goal_x, goal_y):
+        cx, cy = self.centers(indices)
+        return (cx // TILE_SIZE == goal_x // TILE_SIZE) & (cy // TILE_SIZE == goal_y // TILE_SIZE)
+
+    def follow_flow_field(self, indices, player_x, player_y, level):
+        """Шаг к соседней клетке, которая ближе к игроку по общему полю путей."""
+        self.path_length[indices] = 0  # Собственный путь больше не актуален
+        self.path_index[indices] = 0
+        cols, rows = level.cols, level.rows
+        cx, cy = self.centers(indices)
+        tx, ty = cx // TILE_SIZE, cy // TILE_SIZE
+        inside = (tx >= 0) & (tx < cols) & (ty >= 0) & (ty < rows)
+        following = np.where(inside, level.flow_field.next_tiles[np.where(inside, ty * cols + tx, 0)], -1)
+        # Уже в клетке игрока (или поле не ведёт дальше) — идём прямо к нему
+        half = TILE_SIZE // 2
+        target_x = np.where(following < 0, player_x, following % cols * TILE_SIZE + half)
+        target_y = np.where(following < 0, player_y, following // cols * TILE_SIZE + half)
+        self.step_towards(indices, target_x, target_y, level)
+
+    def go_to(self, indices, goal_x, goal_y, level, plan=True):
+        """
+        Движение к целям по путям A* (путь перестраивается, когда закончился).
+        В клетке цели — прямо к ней, без A*. Возвращает маску врагов, для которых строился путь.
+        """
+        plan = plan_mask(plan, len(indices))
+        exhausted = self.path_index[indices] >= self.path_length[indices]
+        direct = exhausted & self.in_goal_tile(indices, goal_x, goal_y)
+        needed = exhausted & ~direct
+        self.replan[indices[needed & ~plan]] = 1
+        built = needed & plan
+        if built.any():
+            cx, cy = self.centers(indices)
+            for position in np.flatnonzero(built).tolist():
+                start = (int(cx[position]), int(cy[position]))
+                goal = (float(goal_x[position]), float(goal_y[position]))
+                self.set_path(indices[position], build_path(level, start, goal))
+
+        path_index = self.path_index[indices]
+        walking = path_index < self.path_length[indices]
+        slots = np.minimum(path_index, self.path_x.shape[1] - 1)
+        node_x = self.path_x[indices, slots]
+        node_y = self.path_y[indices, slots]
+        stepping = walking | direct
+        if stepping.any():
+            self.step_towards(indices[stepping], np.where(walking, node_x, goal_x)[stepping],
+                              np.where(walking, node_y, goal_y)[stepping], level)
+        if walking.any():
+            # Дошли до узла пути
+            walkers = indices[walking]
+            cx, cy = self.centers(walkers)
+            arrived = np.hypot(node_x[walking] - cx, node_y[walking] - cy) < REACH_DISTANCE
+            self.path_index[walkers[arrived]] += 1
+        return built
+
+    def step_towards(self, indices, target_x, target_y, level):
+        """Один шаг к точкам с откатом по оси, на которой упёрлись в стену."""
+        x, y = self.x[indices], self.y[indices]
+        dx = target_x - (x.astype(np.int64) + HALF_SIZE).astype(np.float64)
+        dy = target_y - (y.astype(np.int64) + HALF_SIZE).astype(np.float64)
+        length = np.hypot(dx, dy)
+        moving = length > 0
+        np.divide(dx, length, out=dx, where=moving)
+        np.divide(dy, length, out=dy, where=moving)
+        self.dir_x[indices] = dx
+        self.dir_y[indices] = dy
+        self.facing_right[indices] = dx > 0
+
+        speed = self.speed[indices]
+        new_x = x + dx * speed
+        x = np.where(level.collides_with_walls(new_x, y, ENEMY_SIZE), x, new_x)
+        new_y = y + dy * speed
+        y = np.where(level.collides_with_walls(x, new_y, ENEMY_SIZE), y, new_y)
+        self.x[indices] = x
+        self.y[indices] = y
@@ -0,0 +1,353 @@
+"""
+Программный интерфейс к игре для ботов: reset/step и наблюдения-векторы.
+
+GameEnv — одна партия без окна и звука (как headless.py), управляемая
+действиями: действие — битовая маска controls.BIT_* (0..ACTION_COUNT-1)
+или Controls. step() возвращает (наблюдение, награда, конец, info).
+
+VecEnv — N партий в пуле процессов: партии делятся на группы по процессам,
+step(actions) рассылает действия всем процессам сразу и собирает ответы,
+поэтому пропускная способность растёт с числом ядер. Разобранные уровни
+(level_cache.CompiledLevel) родитель один раз кладёт в общую память
+(multiprocessing.shared_memory), а процессы строят по ним уровни без
+чтения файлов; маски соседей читаются прямо из общей памяти.
+
+    with VecEnv(16, seed=0) as envs:
+        observations = envs.reset()
+        observations, rewards, dones, infos = envs.step([BIT_RIGHT | BIT_SHOOT] * 16)
+
+Замер скорости:  python env.py --envs 16 --processes 4 --steps 2000
+"""
+import argparse
+import gc
+import multiprocessing
+import os
+import random
+import time
+from array import array
+from multiprocessing import shared_memory
+
+import level_cache
+from boss import Boss
+from controls import Controls, BIT_SHOOT
+from game import Game, DEFAULT_LEVELS, STEP_VICTORY, STEP_LEVEL_COMPLETE, STEP_GAME_COMPLETE, STEP_GAME_OVER
+from settings import TICK_TIME, TILE_SIZE
+
+ACTION_COUNT = 32  # Все сочетания пяти битов controls.BIT_*
+
+# Раскладка наблюдения (array('f')); расстояния — в тайлах от центра игрока
+WINDOW = 7  # Окно тайлов вокруг игрока WINDOW x WINDOW (коды level.TILE_*)
+MAX_ENEMIES = 8  # Ближайшие обычные враги: есть, dx, dy, гонится
+MAX_BOSS_BULLETS = 8  # Ближайшие пули босса: есть, dx, dy
+PLAYER_SIZE = 6  # x, y (доли ширины/высоты уровня), жизни, мёртв, неуязвим, пуль в полёте
+LEVEL_SIZE = 4  # номер уровня, есть финиш, dx, dy до финиша
+BOSS_SIZE = 5  # есть, dx, dy, доля здоровья, стадия
+OBSERVATION_SIZE = (PLAYER_SIZE + LEVEL_SIZE + WINDOW * WINDOW + MAX_ENEMIES * 4
+                    + BOSS_SIZE + MAX_BOSS_BULLETS * 3)
+
+# Награды
+REWARD_KILL = 1.0  # Убит обычный враг
+REWARD_BOSS_HIT = 0.5  # За единицу здоровья босса
+REWARD_BONUS = 0.5  # Подобран бонус (+1 жизнь)
+REWARD_LIFE_LOST = -1.0
+REWARD_LEVEL = 5.0  # Пройден уровень
+REWARD_VICTORY = 10.0  # Босс убит или пройден последний уровень
+REWARD_GAME_OVER = -5.0
+
+TERMINAL_RESULTS = (STEP_VICTORY, STEP_GAME_COMPLETE, STEP_GAME_OVER)
+
+
+# -------------------------------
+#   Наблюдение
+# -------------------------------
+def observe(game):
+    """Вектор наблюдения длины OBSERVATION_SIZE по состоянию Level, Player, Enemy и Boss."""
+    level, player = game.level, game.player
+    px, py = player.rect.center
+    obs = array('f', [px / max(level.width, 1), py / max(level.height, 1), player.lives,
+                      float(player.is_dead), float(player.invincible), len(player.bullets)])
+
+    finish = level.finish_rect
+    if finish:
+        obs.extend((game.current_level, 1.0, (finish.centerx - px) / TILE_SIZE, (finish.centery - py) / TILE_SIZE))
+    else:
+        obs.extend((game.current_level, 0.0, 0.0, 0.0))
+
+    tx, ty, half = px // TILE_SIZE, py // TILE_SIZE, WINDOW // 2
+    obs.extend(level.tile_at(x, y) for y in range(ty - half, ty + half + 1) for x in range(tx - half, tx + half + 1))
+
+    boss, enemies = None, []
+    for enemy in game.enemies:
+        if isinstance(enemy, Boss):
+            boss = enemy
+        else:
+            ex, ey = enemy.rect.center
+            enemies.append(((ex - px) / TILE_SIZE, (ey - py) / TILE_SIZE, float(enemy.chasing)))
+    enemies.sort(key=lambda item: item[0] * item[0] + item[1] * item[1])
+    for dx, dy, chasing in enemies[:MAX_ENEMIES]:
+        obs.extend((1.0, dx, dy, chasing))
+    obs.extend([0.0] * (4 * (MAX_ENEMIES - min(len(enemies), MAX_ENEMIES))))
+
+    bullets = []
+    if boss:
+        bx, by = boss.rect.center
+        obs.extend((1.0, (bx - px) / TILE_SIZE, (by - py) / TILE_SIZE, boss.health / boss.max_health, boss.state))
+        bullets = [((x - px) / TILE_SIZE, (y - py) / TILE_SIZE) for x, y in boss.bullets.centers()]
+        bullets.sort(key=lambda item: item[0] * item[0] + item[1] * item[1])
+    else:
+        obs.extend([0.0] * BOSS_SIZE)
+    for dx, dy in bullets[:MAX_BOSS_BULLETS]:
+        obs.extend((1.0, dx, dy))
+    obs.extend([0.0] * (3 * (MAX_BOSS_BULLETS - min(len(bullets), MAX_BOSS_BULLETS))))
+    return obs
+
+
+# -------------------------------
+#   Одна партия
+# -------------------------------
+class GameEnv:
+    def __init__(self, levels=None, max_steps=3600, frame_skip=1, compiled_levels=None):
+        self.levels = list(levels or DEFAULT_LEVELS)
+        self.max_steps = max_steps  # После стольких шагов партия обрывается (info['truncated'])
+        self.frame_skip = frame_skip  # Тиков на один шаг (действие повторяется, выстрел — один раз)
+        self.compiled_levels = compiled_levels  # path -> CompiledLevel (см. SharedLevels)
+        self.game = None
+        self.steps = 0
+
+    def reset(self, seed=None):
+        """Новая партия с первого уровня. Возвращает первое наблюдение."""
+        self.game = Game(self.levels, seed=seed, compiled_levels=self.compiled_levels)
+        self.steps = 0
+        return observe(self.game)
+
+    def step(self, action):
+        """Один шаг (frame_skip тиков) с действием-маской или Controls."""
+        game = self.game
+        controls = action if isinstance(action, Controls) else Controls.from_mask(action)
+        reward, result = 0.0, None
+        for tick in range(self.frame_skip):
+            level, player = game.current_level, game.player
+            lives, enemies = player.lives, len(game.enemies)
+            boss_health = sum(enemy.health for enemy in game.enemies if isinstance(enemy, Boss))
+
+            result = game.step(controls if tick == 0 else controls._replace(shoot=False), TICK_TIME)
+
+            if result == STEP_LEVEL_COMPLETE:
+                reward += REWARD_LEVEL
+            elif game.current_level == level:
+                reward += REWARD_KILL * (enemies - len(game.enemies))
+                reward += REWARD_BOSS_HIT * (boss_health - sum(enemy.health for enemy in game.enemies
+                                                               if isinstance(enemy, Boss)))
+                if player.lives < lives:
+                    reward += REWARD_LIFE_LOST * (lives - player.lives)
+                elif player.lives > lives:
+                    reward += REWARD_BONUS * (player.lives - lives)
+            if result in (STEP_VICTORY, STEP_GAME_COMPLETE):
+                reward += REWARD_VICTORY
+            elif result == STEP_GAME_OVER:
+                reward += REWARD_GAME_OVER
+            if result in TERMINAL_RESULTS:
+                break
+
+        self.steps += 1
+        truncated = self.steps >= self.max_steps and result not in TERMINAL_RESULTS
+        info = {
+            'result': result,
+            'truncated': truncated,
+            'frame': game.frame,
+            'level': game.current_level,
+            'lives': game.player.lives,
+        }
+        return observe(game), reward, result in TERMINAL_RESULTS or truncated, info
+
+
+# -------------------------------
+#   Уровни в общей памяти
+# -------------------------------
+class SharedLevels:
+    """
+    Разобранные уровни в одном блоке общей памяти (формат level_cache.pack_level).
+    Создаётся в родительском процессе; процессы подключаются по spec через attach().
+    """
+
+    def __init__(self, paths):
+        blobs = {path: level_cache.pack_level(level_cache.load_level(path)) for path in dict.fromkeys(paths)}
+        self.memory = shared_memory.SharedMemory(create=True, size=max(sum(map(len, blobs.values())), 1))
+        self.offsets = {}  # путь -> (смещение, длина)
+        offset = 0
+        for path, blob in blobs.items():
+            self.memory.buf[offset:offset + len(blob)] = blob
+            self.offsets[path] = (offset, len(blob))
+            offset += len(blob)
+
+    @property
+    def spec(self):
+        """То, что передаётся в процесс (имя блока и смещения уровней)."""
+        return self.memory.name, self.offsets
+
+    @staticmethod
+    def attach(spec):
+        """Подключается к блоку. Возвращает (SharedMemory, {путь: CompiledLevel})."""
+        name, offsets = spec
+        memory = shared_memory.SharedMemory(name=name)
+        compiled = {}
+        for path, (offset, length) in offsets.items():
+            _, _, compiled[path] = level_cache.unpack_level(memory.buf[offset:offset + length])
+        return memory, compiled
+
+    def close(self):
+        self.memory.close()
+        self.memory.unlink()
+
+
+def _serve(conn, envs, seed_stride):
+    """Цикл команд процесса пула: ('reset', seeds), ('step', actions), ('close', None)."""
+    seeds = [None] * len(envs)
+    while True:
+        command, data = conn.recv()
+        if command == 'step':
+            results = []
+            for index, (env, action) in enumerate(zip(envs, data)):
+                obs, reward, done, info = env.step(action)
+                if done:
+                    # Автосброс: следующая партия с новым сидом, последнее наблюдение — в info
+                    info['final_observation'] = obs
+                    if seeds[index] is not None:
+                        seeds[index] += seed_stride
+                    obs = env.reset(seeds[index])
+                results.append((obs, reward, done, info))
+            conn.send(results)
+        elif command == 'reset':
+            seeds = list(data)
+            conn.send([env.reset(seed) for env, seed in zip(envs, seeds)])
+        elif command == 'close':
+            return
+
+
+def _worker(conn, count, shared_spec, levels, seed_stride, env_kwargs):
+    """Процесс пула: count партий на уровнях из общей памяти."""
+    from headless import init_headless
+    init_headless()
+    memory, compiled = SharedLevels.attach(shared_spec)
+    envs = [GameEnv(levels, compiled_levels=compiled, **env_kwargs) for _ in range(count)]
+    try:
+        _serve(conn, envs, seed_stride)
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        del envs, compiled  # Уровни держат срезы общей памяти (в том числе в циклических ссылках)
+        gc.collect()
+        memory.close()
+        conn.close()
+
+
+# -------------------------------
+#   Пул партий
+# -------------------------------
+class VecEnv:
+    def __init__(self, num_envs, levels=None, processes=None, seed=None, context="spawn", **env_kwargs):
+        """
+        num_envs партий в processes процессах (по умолчанию — по числу ядер).
+        seed — сид партии 0, у партии i — seed + i; env_kwargs передаются в GameEnv.
+        Процессы запускаются через spawn: в них не попадает состояние SDL родителя.
+        """
+        self.num_envs = num_envs
+        self.seed = seed
+        levels = list(levels or DEFAULT_LEVELS)
+        processes = max(1, min(num_envs, processes or os.cpu_count() or 1))
+        ctx = multiprocessing.get_context(context)
+
+        self.shared = SharedLevels(levels)
+        self.shards = []  # (первая партия, число партий) по процессам
+        self.connections = []
+        self.processes = []
+        start = 0
+        for index in range(processes):
+            count = num_envs // processes + (1 if index < num_envs % processes else 0)
+            parent_conn, child_conn = ctx.Pipe()
+            process = ctx.Process(target=_worker, name=f"game-env-{index}", daemon=True,
+                                  args=(child_conn, count, self.shared.spec, levels, num_envs, env_kwargs))
+            process.start()
+            child_conn.close()
+            self.shards.append((start, count))
+            self.connections.append(parent_conn)
+            self.processes.append(process)
+            start += count
+        self.closed = False
+
+    def reset(self):
+        """Сбрасывает все партии. Возвращает список наблюдений."""
+        for (start, count), conn in zip(self.shards, self.connections):
+            seeds = [None if self.seed is None else self.seed + i for i in range(start, start + count)]
+            conn.send(('reset', seeds))
+        observations = []
+        for conn in self.connections:
+            observations.extend(conn.recv())
+        return observations
+
+    def step(self, actions):
+        """
+        Шаг всех партий. Возвращает списки (наблюдения, награды, концы, info).
+        Закончившиеся партии сразу начинаются заново; их последнее наблюдение — info['final_observation'].
+        """
+        actions = [action.to_mask() if isinstance(action, Controls) else action for action in actions]
+        for (start, count), conn in zip(self.shards, self.connections):
+            conn.send(('step', actions[start:start + count]))
+        observations, rewards, dones, infos = [], [], [], []
+        for conn in self.connections:
+            for obs, reward, done, info in conn.recv():
+                observations.append(obs)
+                rewards.append(reward)
+                dones.append(done)
+                infos.append(info)
+        return observations, rewards, dones, infos
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        for conn in self.connections:
+            try:
+                conn.send(('close', None))
+            except (BrokenPipeError, OSError):
+                pass
+        for process in self.processes:
+            process.join(5)
+            if process.is_alive():
+                process.terminate()
+        for conn in self.connections:
+            conn.close()
+        self.shared.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Замер скорости пула партий со случайными действиями")
+    parser.add_argument("--envs", type=int, default=8)
+    parser.add_argument("--processes", type=int, help="по умолчанию — по числу ядер")
+    parser.add_argument("--steps", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with VecEnv(args.envs, processes=args.processes, seed=args.seed) as envs:
+        envs.reset()
+        episodes, total_reward = 0, 0.0
+        started = time.perf_counter()
+        for _ in range(args.steps):
+            # Случайное направление, выстрел примерно раз в 20 шагов
+            actions = [rng.randrange(ACTION_COUNT) & ~BIT_SHOOT | (BIT_SHOOT if rng.random() < 0.05 else 0)
+                       for _ in range(args.envs)]
+            _, rewards, dones, _ = envs.step(actions)
+            episodes += sum(dones)
+            total_reward += sum(rewards)
+        elapsed = time.perf_counter() - started
+    ticks = args.steps * args.envs
+    print(f"Партий: {args.envs} в {len(envs.processes)} процессах, шагов: {ticks}, {elapsed:.2f} с "
+          f"({ticks / max(elapsed, 1e-9):.0f} шагов/с), завершено эпизодов: {episodes}, "
+          f"средняя награда за шаг: {total_reward / max(ticks, 1):.4f}")
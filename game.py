@@ -0,0 +1,185 @@
+"""
+Игровая логика без ввода с клавиатуры, звука «по умолчанию» и отрисовки.
+
+Game хранит текущий уровень, игрока и врагов и продвигает их на один тик
+в step(controls, delta_time); перед тиком запоминаются позиции прошлого тика,
+чтобы отрисовка могла интерполировать между ними (см. settings.TICK_RATE). Время — своё (сумма delta_time), а не
+pygame.time.get_ticks(), поэтому симуляция идёт так быстро, как позволяет
+процессор, и одинаково в окне и без него. main_game() рисует состояние Game
+и обрабатывает экраны победы/проигрыша, headless.py гоняет его без окна.
+"""
+from audio import NULL_SOUND
+from level import Level, preload_sprites
+from player import Player
+from prefetch import LevelPrefetcher
+from profiler import NULL_PROFILER
+from rng import RandomStreams
+
+DEFAULT_LEVELS = [
+    "levels/level1.txt",
+    "levels/level2.txt",
+]
+
+# Что произошло за кадр (результат Game.step)
+STEP_CONTINUE = None
+STEP_VICTORY = 'victory'  # Босс убит
+STEP_LEVEL_COMPLETE = 'level_complete'  # Дошли до финиша, загружен следующий уровень
+STEP_GAME_COMPLETE = 'game_complete'  # Дошли до финиша последнего уровня
+STEP_GAME_OVER = 'game_over'  # Жизни кончились и анимация смерти доиграла
+
+
+class Game:
+    def __init__(self, levels=None, sound_shoot=NULL_SOUND, sound_hit=NULL_SOUND, start_level=0,
+                 profiler=NULL_PROFILER, seed=None, compiled_levels=None, prefetch=False):
+        self.levels = list(levels or DEFAULT_LEVELS)
+        # Уже разобранные уровни по путям (например, из общей памяти, см. env.py); остальные — из файлов
+        self.compiled_levels = compiled_levels or {}
+        # Следующий уровень и копия текущего (для перезапуска) готовятся в фоновом потоке
+        self.prefetcher = LevelPrefetcher() if prefetch else None
+        self.seed = seed  # При одном сиде и одном вводе игра повторяется тик в тик
+        self.streams = RandomStreams(seed)
+        self.profiler = profiler  # Отметки фаз тика (см. profiler.Profiler.lap)
+        self.sound_shoot = sound_shoot
+        self.sound_hit = sound_hit
+        self.current_level = start_level
+        self.time = 0  # Время симуляции в мс
+        self.frame = 0  # Номер кадра симуляции
+        self.collected_bonuses = []  # Бонусы, подобранные за последний кадр (для перерисовки)
+        self.level = None
+        self.player = None
+        self.enemies = []
+        self.load_level(start_level)
+
+    # -------------------------------
+    #   Уровни
+    # -------------------------------
+    def build_level(self, index):
+        """Новый объект Level по номеру (можно вызывать из фонового потока)."""
+        # Каждая загрузка уровня (и перезапуск) начинает его потоки случайности заново
+        path, streams = self.levels[index], self.streams.child(f"level{index}")
+        compiled = self.compiled_levels.get(path)
+        if compiled is not None:
+            return Level.from_compiled(compiled, streams)
+        return Level.from_file(path, streams)
+
+    def load_level(self, index):
+        """Загружает уровень по номеру и ставит на него игрока (объект Player переиспользуется)."""
+        self.current_level = index
+        level = self.prefetcher.take(index) if self.prefetcher else None
+        self.level = level or self.build_level(index)
+        start_x, start_y = self.level.start_pos
+        if self.player is None:
+            self.player = Player(start_x, start_y, "src/sprites/wizard_tiles.png", 32, 32, self.sound_shoot)
+        else:
+            self.player.reset(start_x, start_y)
+        self.enemies = self.level.enemies
+        if self.prefetcher:
+            self.prefetch_levels()
+
+    def prefetch_levels(self):
+        """Заказывает в фоне копию текущего уровня (для перезапуска) и следующий уровень."""
+        preload_sprites()
+        wanted = [self.current_level]
+        if self.current_level + 1 < len(self.levels):
+            wanted.append(self.current_level + 1)
+        self.prefetcher.keep_only(wanted)
+        for index in wanted:
+            self.prefetcher.request(index, lambda index=index: self.build_level(index))
+
+    def restart_level(self):
+        """Перезапуск текущего уровня (после «Game Over»)."""
+        self.load_level(self.current_level)
+        self.player.lives = 3  # Восстанавливаем жизни
+
+    @property
+    def is_over(self):
+        """Игрок мёртв и анимация смерти дошла до последнего кадра."""
+        player = self.player
+        if player.lives > 0 or not player.is_dead:
+            return False
+        return player.current_frame >= len(player.animations[player.current_animation]) - 1
+
+    # -------------------------------
+    #   Один кадр
+    # -------------------------------
+    def save_state(self):
+        """Позиции прошлого тика для интерполяции при отрисовке."""
+        self.player.save_state()
+        self.level.enemy_pool.save_positions()
+        for enemy in self.enemies:
+            if not getattr(enemy, 'pooled', False):
+                enemy.save_state()
+
+    def step(self, controls, delta_time):
+        """
+        Продвигает игру на delta_time мс с управлением controls.
+        Возвращает одно из STEP_* (None — ничего особенного).
+        """
+        self.time += delta_time
+        self.frame += 1
+        self.collected_bonuses = []
+        level, player, profiler = self.level, self.player, self.profiler
+        self.save_state()
+
+        if controls.shoot:
+            player.shoot()
+
+        # Логику обновляем и после смерти, чтобы кадры анимации смерти переключались
+        player.update(delta_time, level, controls)
+        profiler.lap('player.update')
+
+        for trap in level.traps:
+            if player.rect.colliderect(trap):
+                player.rect.x, player.rect.y = level.start_pos
+                player.previous_pos = level.start_pos  # Телепорт — без интерполяции
+        for bonus in level.bonuses[:]:
+            if player.rect.colliderect(bonus):
+                player.lives += 1
+                level.collect_bonus(bonus)
+                self.collected_bonuses.append(bonus)
+        profiler.lap('traps_bonuses')
+
+        # Обычные враги обновляются пакетно через пул уровня, остальные (босс) — по одному
+        level.enemy_pool.update(player, level, delta_time, level.ai_scheduler)
+        for enemy in self.enemies:
+            if not getattr(enemy, 'pooled', False):
+                enemy.update(player, level, delta_time, self.time)
+        profiler.lap('enemies')
+
+        result = STEP_CONTINUE
+        for enemy in self.enemies:
+            if getattr(enemy, 'is_dead', False):
+                result = STEP_VICTORY
+
+        # Столкновения с врагами (уменьшаем жизни и вызываем die(), если <= 0)
+        for enemy in self.enemies:
+            if player.rect.colliderect(enemy.rect):
+                if not player.invincible:  # Если неуязвимость не активна
+                    player.lives -= 1
+                    self.sound_hit.play()
+
+                    # Включаем i-frames
+                    player.invincible = True
+                    player.invincible_timer = player.invincible_time
+
+                    if player.lives <= 0:
+                        player.die()
+                # Противника не удаляем!
+                break
+        profiler.lap('collisions')
+
+        # Финиш
+        if level.finish_rect and player.rect.colliderect(level.finish_rect):
+            if self.current_level + 1 >= len(self.levels):
+                return STEP_GAME_COMPLETE
+            self.load_level(self.current_level + 1)
+            result = STEP_LEVEL_COMPLETE
+        profiler.lap('finish')
+
+        # Снаряды
+        self.player.update_bullets(self.level, self.enemies)
+        profiler.lap('update_bullets')
+
+        if result is STEP_CONTINUE and self.is_over:
+            result = STEP_GAME_OVER
+        return result
@@ -0,0 +1,164 @@
+"""
+Запуск игры без окна и звука — для балансировки и регрессионных прогонов.
+
+SDL работает с драйверами dummy (видео и аудио), ничего не рисуется,
+а время идёт по фиксированному шагу без clock.tick, поэтому партия
+прогоняется так быстро, как позволяет процессор.
+
+Управление задаётся «политикой» — функцией policy(game) -> Controls:
+    run_game(idle_policy)                         — игрок стоит
+    run_game(random_policy(seed=1))               — случайные нажатия
+    run_game(scripted_policy([(0, Controls(right=True)), (120, Controls(shoot=True))]))
+
+Из консоли:  python headless.py --games 100 --frames 3600 --policy random
+Повтор:      python headless.py --replay replays/boss.rpl  (см. replay.py)
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import pygame
+
+from controls import Controls, NO_INPUT
+from game import Game, STEP_CONTINUE, STEP_LEVEL_COMPLETE
+from profiler import Profiler
+from replay import load_replay, play_headless, state_digest
+from settings import TICK_TIME
+
+
+def init_headless():
+    """Поднимает pygame с dummy-драйверами и крошечным окном (нужно для convert_alpha)."""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    pygame.init()
+    if pygame.display.get_surface() is None:
+        pygame.display.set_mode((1, 1))
+
+
+# -------------------------------
+#   Политики управления
+# -------------------------------
+def idle_policy(game):
+    return NO_INPUT
+
+
+def random_policy(seed=None, shoot_chance=0.05, hold_frames=15):
+    """Случайное направление, которое держится hold_frames кадров, и редкие выстрелы."""
+    rng = random.Random(seed)
+    state = {'controls': Controls(), 'left': 0}
+
+    def policy(game):
+        if state['left'] <= 0:
+            state['controls'] = Controls(up=rng.random() < 0.5, down=rng.random() < 0.5,
+                                         left=rng.random() < 0.5, right=rng.random() < 0.5)
+            state['left'] = hold_frames
+        state['left'] -= 1
+        return state['controls']._replace(shoot=rng.random() < shoot_chance)
+
+    return policy
+
+
+def scripted_policy(script):
+    """
+    Заранее записанный ввод: список (номер кадра, Controls), отсортированный по кадрам.
+    Каждое состояние держится до следующей записи; выстрел — только в кадре записи.
+    """
+    script = sorted(script, key=lambda entry: entry[0])
+    state = {'next': 0, 'controls': NO_INPUT}
+
+    def policy(game):
+        shoot = False
+        while state['next'] < len(script) and script[state['next']][0] <= game.frame:
+            state['controls'] = script[state['next']][1]
+            shoot = shoot or state['controls'].shoot
+            state['next'] += 1
+        return state['controls']._replace(shoot=shoot)
+
+    return policy
+
+
+# -------------------------------
+#   Прогон партий
+# -------------------------------
+def run_game(policy, levels=None, max_frames=3600, delta_time=TICK_TIME, seed=None):
+    """
+    Одна партия до победы, конца игры, «Game Over» или max_frames кадров.
+    seed — сид случайности уровня и босса (см. rng.py). Возвращает словарь с итогом.
+    """
+    init_headless()
+    game = Game(levels, seed=seed)
+    result = STEP_CONTINUE
+    levels_completed = 0
+    while game.frame < max_frames:
+        result = game.step(policy(game), delta_time)
+        if result == STEP_LEVEL_COMPLETE:
+            levels_completed += 1
+        elif result is not STEP_CONTINUE:
+            break
+    if result in (STEP_CONTINUE, STEP_LEVEL_COMPLETE):
+        result = 'timeout'
+    return {
+        'result': result,
+        'frames': game.frame,
+        'time_ms': game.time,
+        'level': game.current_level,
+        'levels_completed': levels_completed,
+        'lives': game.player.lives,
+        'enemies_left': len(game.enemies),
+    }
+
+
+def run_games(count, policy_factory, seed=None, **kwargs):
+    """count партий; policy_factory(номер партии) создаёт политику для каждой, сид партии — seed + номер."""
+    return [run_game(policy_factory(i), seed=None if seed is None else seed + i, **kwargs) for i in range(count)]
+
+
+def run_replay(path):
+    """Прогон файла повтора без окна (см. replay.py): печатает отпечаток состояния и скорость."""
+    init_headless()
+    replay = load_replay(path)
+    profiler = Profiler()
+    started = time.perf_counter()
+    game, result = play_headless(replay, profiler)
+    elapsed = time.perf_counter() - started
+    work = profiler.work_times
+    print(f"Повтор {path}: {game.frame} тиков из {len(replay.ticks)}, {elapsed:.3f} с "
+          f"({len(replay.ticks) / max(elapsed, 1e-9):.0f} тиков/с), итог: {result or 'конец записи'}")
+    print(f"Тик: p95 {profiler.percentile(95, work):.3f} мс, p99 {profiler.percentile(99, work):.3f} мс")
+    print(f"Состояние: {state_digest(game)}")
+    return game
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Прогон партий без окна")
+    parser.add_argument("--games", type=int, default=10)
+    parser.add_argument("--frames", type=int, default=3600, help="максимум кадров на партию")
+    parser.add_argument("--policy", choices=("idle", "random"), default="random")
+    parser.add_argument("--seed", type=int, default=0, help="сид первой партии (политика random и уровни)")
+    parser.add_argument("--replay", metavar="PATH", help="вместо партий проиграть файл повтора")
+    args = parser.parse_args()
+
+    if args.replay:
+        run_replay(args.replay)
+        sys.exit()
+
+    if args.policy == "idle":
+        def factory(i):
+            return idle_policy
+    else:
+        def factory(i):
+            return random_policy(seed=args.seed + i)
+
+    started = time.perf_counter()
+    results = run_games(args.games, factory, seed=args.seed, max_frames=args.frames)
+    elapsed = time.perf_counter() - started
+
+    outcomes = {}
+    for item in results:
+        outcomes[item['result']] = outcomes.get(item['result'], 0) + 1
+    frames = sum(item['frames'] for item in results)
+    print(f"Партий: {len(results)}, кадров: {frames}, {elapsed:.2f} с ({frames / max(elapsed, 1e-9):.0f} кадров/с)")
+    for outcome, count in sorted(outcomes.items()):
+        print(f"  {outcome}: {count}")
@@ -1,66 +1,397 @@
-import pygame, random
-from settings import TILE_SIZE
+import numpy as np
+import pygame
+from settings import TILE_SIZE, GREEN, PATHFINDING_DIAGONAL, AI_SCHEDULING
 from enemy import Enemy
+from enemy_pool import EnemyPool
+from rng import RandomStreams
+
+# Коды тайлов в сетке уровня (по одному байту на клетку)
+TILE_EMPTY = 0
+TILE_WALL = 1
+TILE_WATER = 2
+TILE_TRAP = 3
+TILE_BONUS = 4
+TILE_FINISH = 5
+
+# Символ карты -> код тайла (остальные символы — пустая клетка)
+TILE_CODES = {'1': TILE_WALL, 'W': TILE_WATER, 'T': TILE_TRAP, 'S': TILE_BONUS, 'F': TILE_FINISH}
+
+# Таблица для bytes.translate: код тайла -> 1, если тайл непроходим
+SOLID_TABLE = bytes(1 if code == TILE_WALL else 0 for code in range(256))
+
+ENEMY_SPRITE_SHEET = "src/sprites/enemy.png"
+
+# Биты маски соседей (соседняя клетка непроходима или за пределами карты)
+NEIGHBOR_RIGHT = 1
+NEIGHBOR_LEFT = 2
+NEIGHBOR_DOWN = 4
+NEIGHBOR_UP = 8
+
+
+def parse_tiles(level_data):
+    """
+    Разбирает карту (список строк) без создания объектов.
+    Возвращает (cols, rows, grid, spawns, start_tile, finish_tile),
+    где spawns — список (символ, tx, ty) для врагов и босса.
+    """
+    cols = max((len(row) for row in level_data), default=0)
+    rows = len(level_data)
+    grid = bytearray(cols * rows)
+    spawns = []
+    start_tile = (0, 0)
+    finish_tile = None
+    for y, row in enumerate(level_data):
+        for x, tile in enumerate(row):
+            code = TILE_CODES.get(tile)
+            if code is not None:
+                grid[y * cols + x] = code
+            if tile in ('E', 'B'):
+                spawns.append((tile, x, y))
+            elif tile == 'P':
+                start_tile = (x, y)
+            elif tile == 'F':
+                finish_tile = (x, y)
+    return cols, rows, grid, spawns, start_tile, finish_tile
+
+
+def compute_neighbor_masks(solid_mask, cols, rows):
+    """
+    Маски соседей для всех клеток сразу (NEIGHBOR_* — сосед непроходим).
+    Сдвинутые копии маски стен склеиваются как большие целые числа,
+    так что побитовое ИЛИ выполняется для всей сетки за одну операцию.
+    """
+    size = cols * rows
+    edge_row = b'\x01' * cols
+    lines = [bytes(solid_mask[y * cols:(y + 1) * cols]) for y in range(rows)]
+    right = b''.join(line[1:] + b'\x01' for line in lines)
+    left = b''.join(b'\x01' + line[:-1] for line in lines)
+    down = bytes(solid_mask[cols:]) + edge_row
+    up = edge_row + bytes(solid_mask[:size - cols])
+    combined = (int.from_bytes(right, 'big')
+                | int.from_bytes(left, 'big') << 1
+                | int.from_bytes(down, 'big') << 2
+                | int.from_bytes(up, 'big') << 3)
+    return combined.to_bytes(size, 'big')
+
+
+def preload_sprites():
+    """
+    Загружает кадры врагов в главном потоке: после этого уровень можно
+    собирать в фоновом потоке (см. prefetch.py) без convert_alpha вне главного.
+    """
+    from assets import load_sprite_frames
+    load_sprite_frames(ENEMY_SPRITE_SHEET, 32, 32)
+    load_sprite_frames(ENEMY_SPRITE_SHEET, 32, 32, flip=True)
+
 
 class Level:
-    def __init__(self, level_data):
-        self.walls = []
+    def __init__(self, level_data, streams=None):
+        self._init_fields(streams)
+        self.parse_level(level_data)
+
+    def _init_fields(self, streams):
+        """Поля пустого уровня (общие для разбора строк и загрузки из кэша)."""
+        self.streams = streams or RandomStreams()  # Случайность уровня и его объектов (см. rng.py)
+        self.rng = self.streams.stream('level')
         self.enemies = []
-        self.water = []  # Добавляем тайлы воды
-        self.traps = []  # Добавляем тайлы ловушек
-        self.bonuses = []  # Добавляем тайлы бонусов
+        self.grid = bytearray()  # Сетка уровня: код тайла на клетку, построчно
+        self.cols = 0
+        self.rows = 0
+        self.spawns = []  # Точки появления врагов: (символ, tx, ty)
         self.start_pos = (0, 0)
         self.finish_rect = None
         self.width = 0
         self.height = 0
-        self.parse_level(level_data)
+        self.background = None  # Заранее отрисованный статичный слой уровня
+        self._rect_views = {}  # Кэш списков Rect по коду тайла (строятся лениво)
+        self._solid_mask = None
+        self._neighbor_masks = None
+        self._wall_grid = None
+        self.map_version = 0  # Растёт при каждом изменении проходимости сетки
+        self.flow_field = None
+        self.pathfinder = None
+        self.visibility = None
+        self.enemy_pool = None
+        self.ai_scheduler = None
+
+    @classmethod
+    def from_file(cls, path, streams=None):
+        """
+        Загружает уровень из текстового файла. Разобранная сетка берётся из
+        бинарного кэша (см. level_cache), если он не устарел.
+        """
+        import level_cache
+        return cls.from_compiled(level_cache.load_level(path), streams)
+
+    @classmethod
+    def from_compiled(cls, compiled, streams=None):
+        """Уровень из уже разобранной сетки (level_cache.CompiledLevel)."""
+        level = cls.__new__(cls)  # Без разбора пустой карты: setup() один раз, ниже
+        level._init_fields(streams)
+        level.cols, level.rows = compiled.cols, compiled.rows
+        level.grid = bytearray(compiled.grid)  # Своя копия: уровень меняет сетку (бонусы)
+        level.spawns = compiled.spawns
+        level._neighbor_masks = compiled.neighbor_masks
+        level.setup(compiled.start_tile, compiled.finish_tile)
+        return level
+
     def random_bool(self):
-        return random.choice([True, False])
+        return self.rng.choice([True, False])
     def parse_level(self, level_data):
-        max_width = 0
-        for y, row in enumerate(level_data):
-            max_width = max(max_width, len(row))
-            for x, tile in enumerate(row):
-                position = pygame.Rect(x * TILE_SIZE, y * TILE_SIZE, TILE_SIZE, TILE_SIZE)
-                if tile == '1':
-                    self.walls.append(position)
-                elif tile == 'E':
-                    enemy = Enemy(position.x, position.y, speed=4, sprite_sheet_path="src/sprites/enemy.png",
-                                  tile_width=32, tile_height=32, facing_right = self.random_bool())
-                    self.enemies.append(enemy)
-                elif tile == 'B':
-                    # Создать босса (x, y) - левый верхний угол,
-                    # но учтите, что это 2x2 тайла => можно сместить на 0,0 и просто создать 100x100 rect.
-                    from boss import Boss
-                    boss = Boss(position.x, position.y, TILE_SIZE)
-                    self.enemies.append(boss)  # добавляем в тот же список enemies
-                elif tile == 'P':
-                    self.start_pos = (position.x, position.y)
-                elif tile == 'F':
-                    self.finish_rect = position
-                elif tile == 'W':  # Вода
-                    self.water.append(position)
-                elif tile == 'T':  # Ловушка
-                    self.traps.append(position)
-                elif tile == 'S':  # Бонус
-                    self.bonuses.append(position)
-
-        self.width = max_width * TILE_SIZE
-        self.height = len(level_data) * TILE_SIZE
+        self.cols, self.rows, self.grid, self.spawns, start_tile, finish_tile = parse_tiles(level_data)
+        self.setup(start_tile, finish_tile)
 
-    def draw(self, screen):
+    def setup(self, start_tile, finish_tile):
+        """Размеры, старт/финиш, навигация и объекты по уже готовой сетке."""
+        self.width = self.cols * TILE_SIZE
+        self.height = self.rows * TILE_SIZE
+        self.start_pos = (start_tile[0] * TILE_SIZE, start_tile[1] * TILE_SIZE)
+        self.finish_rect = self.tile_rect(*finish_tile) if finish_tile else None
+        from pathfinding import FlowField, Pathfinder, VisibilityCache
+        self.flow_field = FlowField(self)  # Общее для всех врагов поле путей к игроку
+        self.pathfinder = Pathfinder(self, diagonal=PATHFINDING_DIAGONAL)
+        self.visibility = VisibilityCache(self)
+        self.enemy_pool = EnemyPool()  # Состояние обычных врагов в массивах
+        from ai_scheduler import AIScheduler
+        self.ai_scheduler = AIScheduler() if AI_SCHEDULING else None  # Бюджет ИИ врагов на тик
+        self.spawn_entities()
+
+    def spawn_entities(self):
+        for tile, x, y in self.spawns:
+            if tile == 'E':
+                enemy = Enemy(x * TILE_SIZE, y * TILE_SIZE, speed=4, sprite_sheet_path=ENEMY_SPRITE_SHEET,
+                              tile_width=32, tile_height=32, facing_right = self.random_bool(),
+                              pool=self.enemy_pool)
+                self.enemies.append(enemy)
+            elif tile == 'B':
+                # Создать босса (x, y) - левый верхний угол,
+                # но учтите, что это 2x2 тайла => можно сместить на 0,0 и просто создать 100x100 rect.
+                from boss import Boss
+                boss = Boss(x * TILE_SIZE, y * TILE_SIZE, TILE_SIZE, rng=self.streams.stream('boss'))
+                self.enemies.append(boss)  # добавляем в тот же список enemies
+
+    # -------------------------------
+    #   Сетка тайлов
+    # -------------------------------
+    def tile_rect(self, tx, ty):
+        return pygame.Rect(tx * TILE_SIZE, ty * TILE_SIZE, TILE_SIZE, TILE_SIZE)
+
+    def tile_at(self, tx, ty):
+        """Код тайла в клетке (tx, ty); за пределами карты — пусто."""
+        if 0 <= tx < self.cols and 0 <= ty < self.rows:
+            return self.grid[ty * self.cols + tx]
+        return TILE_EMPTY
+
+    def tile_at_pixel(self, px, py):
+        """Код тайла под точкой в пикселях."""
+        return self.tile_at(int(px // TILE_SIZE), int(py // TILE_SIZE))
+
+    def set_tile(self, tx, ty, code):
+        """
+        Меняет тайл и сбрасывает производные данные. Маски и навигация (map_version)
+        сбрасываются, только если изменилась проходимость клетки (не при подборе бонуса).
+        """
+        index = ty * self.cols + tx
+        old_code = self.grid[index]
+        if old_code == code:
+            return
+        self.grid[index] = code
+        self._rect_views.pop(old_code, None)
+        self._rect_views.pop(code, None)
+        if SOLID_TABLE[old_code] != SOLID_TABLE[code]:
+            self.map_version += 1
+            self._solid_mask = None
+            self._neighbor_masks = None
+            self._wall_grid = None
+
+    def tiles_of_type(self, code):
+        """Список Rect всех клеток с данным кодом (строится один раз и кэшируется)."""
+        rects = self._rect_views.get(code)
+        if rects is None:
+            rects = []
+            cols = self.cols
+            marker = bytes([code])
+            index = self.grid.find(marker)
+            while index != -1:
+                rects.append(self.tile_rect(index % cols, index // cols))
+                index = self.grid.find(marker, index + 1)
+            self._rect_views[code] = rects
+        return rects
+
+    @property
+    def walls(self):
+        return self.tiles_of_type(TILE_WALL)
+
+    @property
+    def water(self):
+        return self.tiles_of_type(TILE_WATER)
+
+    @property
+    def traps(self):
+        return self.tiles_of_type(TILE_TRAP)
+
+    @property
+    def bonuses(self):
+        return self.tiles_of_type(TILE_BONUS)
+
+    def solid_mask(self):
+        """Байтовая маска непроходимых клеток (1 — стена), считается одним translate."""
+        if self._solid_mask is None:
+            self._solid_mask = self.grid.translate(SOLID_TABLE)
+        return self._solid_mask
+
+    def solid_cells(self):
+        """Строки и столбцы всех непроходимых клеток: (rows, cols)."""
+        mask = self.solid_mask()
+        rows, cols = [], []
+        index = mask.find(1)
+        while index != -1:
+            rows.append(index // self.cols)
+            cols.append(index % self.cols)
+            index = mask.find(1, index + 1)
+        return rows, cols
+
+    def neighbor_masks(self):
+        """Маски соседей для всех клеток (см. compute_neighbor_masks)."""
+        if self._neighbor_masks is None:
+            self._neighbor_masks = compute_neighbor_masks(self.solid_mask(), self.cols, self.rows)
+        return self._neighbor_masks
+
+    def neighbor_mask(self, tx, ty):
+        """Маска соседей одной клетки."""
+        return self.neighbor_masks()[ty * self.cols + tx]
+
+    # -------------------------------
+    #   Запросы коллизий по сетке тайлов
+    # -------------------------------
+    def is_solid(self, tx, ty):
+        """Есть ли стена в тайле (tx, ty)."""
+        return self.tile_at(tx, ty) == TILE_WALL
+
+    def is_solid_at(self, point):
+        """Есть ли стена в точке (x, y) в пикселях."""
+        return self.tile_at_pixel(point[0], point[1]) == TILE_WALL
+
+    def walls_in_rect(self, rect):
+        """
+        Стены, пересекающиеся с rect. Проверяются только тайлы под rect,
+        поэтому цена запроса не зависит от общего количества стен.
+        Порядок тот же, что и в self.walls (по строкам).
+        """
+        result = []
+        if rect.width <= 0 or rect.height <= 0:
+            return result
+        x_start = max(rect.left // TILE_SIZE, 0)
+        x_end = min((rect.right - 1) // TILE_SIZE, self.cols - 1)
+        y_start = max(rect.top // TILE_SIZE, 0)
+        y_end = min((rect.bottom - 1) // TILE_SIZE, self.rows - 1)
+        grid, cols = self.grid, self.cols
+        for ty in range(y_start, y_end + 1):
+            for tx in range(x_start, x_end + 1):
+                if grid[ty * cols + tx] == TILE_WALL:
+                    result.append(self.tile_rect(tx, ty))
+        return result
+
+    def collides_with_wall(self, rect):
+        """Пересекается ли rect хотя бы с одной стеной."""
+        if rect.width <= 0 or rect.height <= 0:
+            return False
+        x_start = max(rect.left // TILE_SIZE, 0)
+        x_end = min((rect.right - 1) // TILE_SIZE, self.cols - 1)
+        y_start = max(rect.top // TILE_SIZE, 0)
+        y_end = min((rect.bottom - 1) // TILE_SIZE, self.rows - 1)
+        grid, cols = self.grid, self.cols
+        for ty in range(y_start, y_end + 1):
+            for tx in range(x_start, x_end + 1):
+                if grid[ty * cols + tx] == TILE_WALL:
+                    return True
+        return False
+
+    def wall_grid(self):
+        """
+        Плоская маска стен NumPy (rows + 2) x (cols + 2) с рамкой из пустых клеток:
+        клетки за краем карты сводятся к рамке, и запросы по массивам обходятся без проверок границ.
+        """
+        if self._wall_grid is None:
+            walls = np.zeros((self.rows + 2, self.cols + 2), dtype=bool)
+            walls[1:-1, 1:-1] = np.frombuffer(self.solid_mask(), dtype=np.uint8).reshape(self.rows, self.cols)
+            self._wall_grid = walls.ravel()
+        return self._wall_grid
+
+    def corner_cells(self, left, top, size):
+        """
+        Клетки под углами квадратов size x size (не больше тайла) для массивов NumPy
+        с координатами левого верхнего угла; дробная часть отбрасывается, как в int().
+        Возвращает (tx0, tx1, ty0, ty1) в координатах wall_grid (со сдвигом на рамку).
+        """
+        cols, rows = self.cols, self.rows
+        left = left.astype(np.int64)
+        top = top.astype(np.int64)
+        x0 = np.minimum(np.maximum(left // TILE_SIZE, -1), cols) + 1
+        x1 = np.minimum(np.maximum((left + (size - 1)) // TILE_SIZE, -1), cols) + 1
+        y0 = np.minimum(np.maximum(top // TILE_SIZE, -1), rows) + 1
+        y1 = np.minimum(np.maximum((top + (size - 1)) // TILE_SIZE, -1), rows) + 1
+        return x0, x1, y0, y1
+
+    def wall_corners(self, left, top, size):
+        """
+        Стены под углами квадратов (см. corner_cells). Такой квадрат задевает только клетки
+        под своими углами, поэтому ответ тот же, что у walls_in_rect. Возвращает маски для
+        углов: левый верхний, правый верхний, левый нижний, правый нижний (построчный порядок).
+        """
+        x0, x1, y0, y1 = self.corner_cells(left, top, size)
+        walls, width = self.wall_grid(), self.cols + 2
+        y0 *= width
+        y1 *= width
+        return walls[y0 + x0], walls[y0 + x1], walls[y1 + x0], walls[y1 + x1]
+
+    def collides_with_walls(self, left, top, size):
+        """collides_with_wall сразу для массива квадратов size x size (см. wall_corners)."""
+        top_left, top_right, bottom_left, bottom_right = self.wall_corners(left, top, size)
+        return top_left | top_right | bottom_left | bottom_right
+
+    # -------------------------------
+    #   Отрисовка
+    # -------------------------------
+    def build_background(self):
+        """Один раз рисует все статичные тайлы уровня на отдельную поверхность."""
+        self.background = pygame.Surface((self.width, self.height)).convert()
+        self.draw_tiles(self.background, self.background.get_rect())
+
+    def draw_tiles(self, surface, area):
+        """Рисует фон и тайлы, попадающие в область area."""
+        surface.fill(GREEN, area)
         # Рисуем стены
-        for wall in self.walls:
-            pygame.draw.rect(screen, (0, 0, 0), wall)
+        for wall in self.walls_in_rect(area):
+            pygame.draw.rect(surface, (0, 0, 0), wall.clip(area))
         # Рисуем воду
         for water in self.water:
-            pygame.draw.rect(screen, (0, 0, 255), water)
+            if water.colliderect(area):
+                pygame.draw.rect(surface, (0, 0, 255), water.clip(area))
         # Рисуем ловушки
         for trap in self.traps:
-            pygame.draw.rect(screen, (255, 0, 0), trap)
+            if trap.colliderect(area):
+                pygame.draw.rect(surface, (255, 0, 0), trap.clip(area))
         # Рисуем бонусы
         for bonus in self.bonuses:
-            pygame.draw.rect(screen, (100, 0, 100), bonus)
+            if bonus.colliderect(area):
+                pygame.draw.rect(surface, (100, 0, 100), bonus.clip(area))
         # Рисуем финиш
-        if self.finish_rect:
-            pygame.draw.rect(screen, (255, 215, 0), self.finish_rect)
\ No newline at end of file
+        if self.finish_rect and self.finish_rect.colliderect(area):
+            pygame.draw.rect(surface, (255, 215, 0), self.finish_rect.clip(area))
+
+    def invalidate(self, area):
+        """Перерисовывает в кэше только изменившуюся область."""
+        if self.background is not None:
+            self.draw_tiles(self.background, area)
+
+    def collect_bonus(self, bonus):
+        """Убирает подобранный бонус с уровня и стирает его с фона."""
+        self.set_tile(bonus.x // TILE_SIZE, bonus.y // TILE_SIZE, TILE_EMPTY)
+        self.invalidate(bonus)
+
+    def draw(self, screen):
+        """Статичный слой рисуется одним blit (строится при первом вызове)."""
+        if self.background is None:
+            self.build_background()
+        screen.blit(self.background, (0, 0))
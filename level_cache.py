@@ -0,0 +1,148 @@
+"""
+Файлы уровней и их бинарный кэш.
+
+Уровень хранится в текстовом файле (levels/*.txt) — те же строки карты,
+что раньше были зашиты в main_game(). Шаг «компиляции» разбирает файл один раз
+и сохраняет в levels/__cache__/ бинарный файл: сетку тайлов, точки появления,
+старт/финиш и маски соседей для навигации. При загрузке файл кэша отображается
+в память (mmap): маски соседей остаются срезом отображения и не копируются,
+копируется только сетка, которую уровень меняет. Если исходный файл изменился
+(время изменения или размер), кэш пересобирается.
+
+Компиляция вручную:  python level_cache.py levels/level1.txt levels/level2.txt
+"""
+import mmap
+import os
+import struct
+import sys
+from collections import namedtuple
+
+from level import parse_tiles, compute_neighbor_masks, SOLID_TABLE
+
+CACHE_DIR = "__cache__"
+CACHE_MAGIC = b"WLVL"
+CACHE_VERSION = 1
+
+# magic, версия, mtime_ns и размер исходника, cols, rows, старт (tx, ty), финиш (tx, ty), число спавнов
+HEADER = struct.Struct("<4sHqqHHhhhhI")
+SPAWN = struct.Struct("<cHH")  # символ, tx, ty
+
+CompiledLevel = namedtuple("CompiledLevel",
+                           "cols rows grid spawns start_tile finish_tile neighbor_masks")
+
+
+def read_level_file(path):
+    """Читает строки карты из текстового файла (пробелы значимы, пустые строки в конце отбрасываются)."""
+    with open(path, encoding="utf-8") as f:
+        rows = f.read().split("\n")
+    while rows and not rows[-1].strip():
+        rows.pop()
+    return rows
+
+
+def cache_path_for(path):
+    directory, name = os.path.split(path)
+    return os.path.join(directory, CACHE_DIR, os.path.splitext(name)[0] + ".lvlc")
+
+
+def pack_level(compiled, mtime_ns=0, size=0):
+    """CompiledLevel в бинарный формат кэша (mtime_ns и size — исходного файла)."""
+    finish = compiled.finish_tile or (-1, -1)
+    parts = [HEADER.pack(CACHE_MAGIC, CACHE_VERSION, mtime_ns, size, compiled.cols, compiled.rows,
+                         compiled.start_tile[0], compiled.start_tile[1], finish[0], finish[1],
+                         len(compiled.spawns))]
+    parts.extend(SPAWN.pack(tile.encode("ascii"), x, y) for tile, x, y in compiled.spawns)
+    parts.append(bytes(compiled.grid))
+    parts.append(bytes(compiled.neighbor_masks))
+    return b"".join(parts)
+
+
+def unpack_level(data):
+    """
+    Разбирает бинарный формат кэша (bytes или memoryview).
+    Возвращает (mtime_ns, size, CompiledLevel) или None, если данные не того формата.
+    Сетка копируется (уровень её меняет), маски соседей — срез data.
+    """
+    if len(data) < HEADER.size:
+        return None
+    (magic, version, mtime_ns, size, cols, rows,
+     start_x, start_y, finish_x, finish_y, spawn_count) = HEADER.unpack_from(data)
+    if magic != CACHE_MAGIC or version != CACHE_VERSION:
+        return None
+
+    offset = HEADER.size
+    spawns = []
+    for _ in range(spawn_count):
+        tile, x, y = SPAWN.unpack_from(data, offset)
+        spawns.append((tile.decode("ascii"), x, y))
+        offset += SPAWN.size
+    cells = cols * rows
+    if len(data) != offset + 2 * cells:
+        return None
+    grid = bytearray(data[offset:offset + cells])
+    neighbor_masks = data[offset + cells:offset + 2 * cells]
+
+    finish_tile = (finish_x, finish_y) if finish_x >= 0 else None
+    return mtime_ns, size, CompiledLevel(cols, rows, grid, spawns, (start_x, start_y), finish_tile, neighbor_masks)
+
+
+def compile_level(path, cache_path=None):
+    """Разбирает файл уровня и записывает бинарный кэш. Возвращает CompiledLevel."""
+    cache_path = cache_path or cache_path_for(path)
+    stat = os.stat(path)
+    cols, rows, grid, spawns, start_tile, finish_tile = parse_tiles(read_level_file(path))
+    neighbor_masks = compute_neighbor_masks(grid.translate(SOLID_TABLE), cols, rows)
+    compiled = CompiledLevel(cols, rows, grid, spawns, start_tile, finish_tile, neighbor_masks)
+
+    # Пишем во временный файл и подменяем — чтобы не оставить битый кэш
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp_path = cache_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(pack_level(compiled, stat.st_mtime_ns, stat.st_size))
+    os.replace(tmp_path, cache_path)
+
+    return compiled
+
+
+def load_compiled(path, cache_path=None):
+    """
+    Отображает кэш в память. Возвращает CompiledLevel или None,
+    если кэша нет, он другой версии или исходный файл изменился.
+    Маски соседей — memoryview только для чтения поверх mmap: отображение
+    живёт, пока на них есть ссылки (у CompiledLevel и собранных из него уровней).
+    """
+    cache_path = cache_path or cache_path_for(path)
+    try:
+        stat = os.stat(path)
+        with open(cache_path, "rb") as f:
+            # Пустой файл mmap не отображает (ValueError) — это тоже «нет кэша»
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        unpacked = unpack_level(memoryview(mapped))
+    except (OSError, ValueError, struct.error):
+        return None
+    if unpacked is None:
+        return None
+    mtime_ns, size, compiled = unpacked
+    if mtime_ns != stat.st_mtime_ns or size != stat.st_size:
+        return None
+    return compiled
+
+
+def load_level(path):
+    """Загружает уровень из кэша, при необходимости пересобирая его."""
+    compiled = load_compiled(path)
+    if compiled is not None:
+        return compiled
+    try:
+        return compile_level(path)
+    except OSError:
+        # Каталог кэша недоступен для записи — просто разбираем файл
+        cols, rows, grid, spawns, start_tile, finish_tile = parse_tiles(read_level_file(path))
+        neighbor_masks = compute_neighbor_masks(grid.translate(SOLID_TABLE), cols, rows)
+        return CompiledLevel(cols, rows, grid, spawns, start_tile, finish_tile, neighbor_masks)
+
+
+if __name__ == '__main__':
+    for level_path in sys.argv[1:]:
+        compile_level(level_path)
+        print(f"{level_path} -> {cache_path_for(level_path)}")
@@ -0,0 +1,100 @@
+"""
+Фоновая загрузка ресурсов по манифесту src/manifest.json.
+
+Пока на экране меню, поток загрузчика читает и декодирует файлы:
+картинки (pygame.image.load без convert), звуки (через кэш PCM, см. audio.py)
+и музыку (содержимое файла в память). Перевод картинок в формат экрана
+и нарезка листов на кадры делаются в главном потоке маленькими порциями
+через poll() — между кадрами меню.
+
+    loader = AssetLoader()
+    loader.start()
+    ...
+    loader.poll()          # каждый кадр меню
+    loader.progress()      # 0.0 .. 1.0
+"""
+import threading
+
+import pygame
+
+import assets
+import audio
+
+IMAGE_TYPES = ('sprite_sheet', 'image')
+
+
+class AssetLoader:
+    def __init__(self, entries=None):
+        if entries is None:
+            entries = [entry for entry in assets.load_manifest().values() if entry.get('preload', True)]
+        self.entries = list(entries)
+        self.loaded = 0  # Сколько файлов декодировано в фоне
+        self.finalized = 0  # Сколько картинок подготовлено в главном потоке
+        self.errors = []  # (путь, текст ошибки)
+        self._ready = []  # Картинки, ожидающие подготовки в главном потоке
+        self._thread = threading.Thread(target=self._run, name="asset-loader", daemon=True)
+
+    @property
+    def total(self):
+        return len(self.entries) + sum(1 for entry in self.entries if entry['type'] in IMAGE_TYPES)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    # -------------------------------
+    #   Фоновый поток
+    # -------------------------------
+    def _run(self):
+        for entry in self.entries:
+            path, kind = entry['path'], entry['type']
+            try:
+                if kind in IMAGE_TYPES:
+                    assets.store_decoded(path, pygame.image.load(path))
+                    self._ready.append(entry)
+                elif kind == 'sound':
+                    if pygame.mixer.get_init():
+                        audio.load_sound(path)
+                elif kind == 'music':
+                    assets.load_music_data(path)
+            except (OSError, pygame.error) as error:
+                self.errors.append((path, str(error)))
+                if kind in IMAGE_TYPES:
+                    self.finalized += 1  # Подготовить нечего
+            self.loaded += 1
+
+    # -------------------------------
+    #   Главный поток
+    # -------------------------------
+    def poll(self, max_items=1):
+        """Готовит до max_items декодированных картинок (convert_alpha, нарезка, отражение)."""
+        for _ in range(max_items):
+            if not self._ready:
+                return
+            entry = self._ready.pop(0)
+            path = entry['path']
+            if entry['type'] == 'sprite_sheet':
+                tile_width, tile_height = entry['tile']
+                assets.load_sprite_frames(path, tile_width, tile_height)
+                if entry.get('flip'):
+                    assets.load_sprite_frames(path, tile_width, tile_height, flip=True)
+            else:
+                size = entry.get('size')
+                assets.load_image(path, tuple(size) if size else None)
+            assets.drop_decoded(path)  # Если файл успели загрузить синхронно раньше
+            self.finalized += 1
+
+    def progress(self):
+        """Доля выполненной работы (фоновое декодирование + подготовка картинок)."""
+        total = self.total
+        return (self.loaded + self.finalized) / total if total else 1.0
+
+    @property
+    def done(self):
+        return self.loaded + self.finalized >= self.total
+
+    def wait(self, timeout=None):
+        """Дожидается фонового потока и готовит все оставшиеся картинки."""
+        self._thread.join(timeout)
+        self.poll(len(self._ready))
+        return self.done
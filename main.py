@@ -1,28 +1,71 @@
+import argparse
+import random
 import pygame
 import sys
-from settings import FPS, WHITE, BLUE, GREEN
-from player import Player
-from level import Level
-
-# pygame.mixer.pre_init(44100, -16, 2, 256)
-pygame.init()
-pygame.mixer.init()
-
-sound_shoot = pygame.mixer.Sound("src/sounds/shoot.mp3")
-sound_shoot.set_volume(0.5)
-
-sound_hit = pygame.mixer.Sound("src/sounds/hit.wav")
-sound_hit.set_volume(0.7)
-
-sound_click = pygame.mixer.Sound("src/sounds/shoot_2.mp3")
-sound_click.set_volume(0.3)
+import time
+from settings import FPS, TICK_TIME, MAX_FRAME_TIME, DIRTY_RECT_RENDERING, PROFILING
+from controls import Controls
+from game import Game, STEP_VICTORY, STEP_LEVEL_COMPLETE, STEP_GAME_COMPLETE
+from replay import ReplayRecorder, load_replay, create_game, state_digest, BIT_RESTART, MAX_SEED
+from renderer import DirtyRectRenderer
+from profiler import Profiler, NULL_PROFILER
+from assets import load_image, play_music
+from audio import get_audio
+from loader import AssetLoader
+from ui import gradient_surface, render_text, render_dynamic
 
 # --------------------------------------------
 #  Глобальные переменные (пример)
 # --------------------------------------------
 WIDTH, HEIGHT = 950, 500
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-clock = pygame.time.Clock()
+screen = None  # Окно открывается в init_display()
+clock = None
+loader = None  # Фоновый загрузчик ресурсов (запускается после первого кадра меню)
+
+
+# --------------------------------------------
+#  Запуск
+# --------------------------------------------
+def init_display():
+    """Только то, что нужно для первого кадра меню: окно, шрифты, часы."""
+    global screen, clock
+    pygame.display.init()
+    pygame.font.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    clock = pygame.time.Clock()
+
+
+def start_loading():
+    """Звук и фоновая загрузка ресурсов по манифесту (после того как меню уже на экране)."""
+    global loader
+    if loader is not None:
+        return
+    # pygame.mixer.pre_init(44100, -16, 2, 256)
+    try:
+        pygame.mixer.init()
+    except pygame.error:
+        pass  # Нет звукового устройства — играем без звука
+    loader = AssetLoader().start()
+
+
+def play_click():
+    # Канал берётся из пула звуковой системы (категория «ui»), а не отнимается у других звуков
+    get_audio().effect("src/sounds/shoot_2.mp3").play()
+
+
+def set_music_volume(volume):
+    if pygame.mixer.get_init():
+        pygame.mixer.music.set_volume(volume)
+
+
+def draw_loading_progress(surf):
+    """Полоска загрузки внизу меню, пока фоновый загрузчик не закончил."""
+    if loader is None or loader.done:
+        return
+    bar = pygame.Rect(WIDTH // 2 - 150, HEIGHT - 40, 300, 8)
+    pygame.draw.rect(surf, (40, 40, 80), bar, border_radius=4)
+    pygame.draw.rect(surf, (120, 120, 220), (bar.x, bar.y, int(bar.width * loader.progress()), bar.height),
+                     border_radius=4)
 
 
 # --------------------------------------------
@@ -32,21 +75,12 @@ clock = pygame.time.Clock()
 def draw_gradient_background(surf, top_color, bottom_color):
     """
     Рисует простой вертикальный градиент от top_color к bottom_color.
+    Сам градиент строится один раз для размера и цветов (см. ui.gradient_surface).
     """
-    rect = surf.get_rect()
-    # Высота экрана
-    height = rect.height
+    surf.blit(gradient_surface(surf.get_size(), top_color, bottom_color), (0, 0))
 
-    for y in range(height):
-        # Вычисляем пропорцию между top_color и bottom_color
-        ratio = y / height
-        r = int(top_color[0] + (bottom_color[0] - top_color[0]) * ratio)
-        g = int(top_color[1] + (bottom_color[1] - top_color[1]) * ratio)
-        b = int(top_color[2] + (bottom_color[2] - top_color[2]) * ratio)
-        pygame.draw.line(surf, (r, g, b), (0, y), (rect.width, y))
 
-
-def draw_button(surf, rect, text, font, mouse_pos):
+def draw_button(surf, rect, text, font_size, mouse_pos):
     """
     Рисует кнопку (прямоугольник + текст).
     Подсвечивает кнопку, если курсор мыши внутри rect.
@@ -63,7 +97,7 @@ def draw_button(surf, rect, text, font, mouse_pos):
         pygame.draw.rect(surf, color_normal, rect, border_radius=8)
 
     # Рисуем текст по центру кнопки
-    text_surf = font.render(text, True, text_color)
+    text_surf = render_text(text, font_size, text_color)
     text_rect = text_surf.get_rect(center=rect.center)
     surf.blit(text_surf, text_rect)
 
@@ -72,10 +106,8 @@ def draw_button(surf, rect, text, font, mouse_pos):
 #  Меню настроек (регулировка громкости)
 # --------------------------------------------
 def settings_menu():
-    font = pygame.font.SysFont(None, 50)
-
     # Берём текущую громкость (0.0 - 1.0)
-    current_volume = pygame.mixer.music.get_volume()
+    current_volume = pygame.mixer.music.get_volume() if pygame.mixer.get_init() else 0.0
 
     # Параметры ползунка
     slider_width = 300
@@ -109,7 +141,7 @@ def settings_menu():
                         # Обновляем громкость сразу
                         current_volume = (mouse_pos[0] - slider_x) / slider_width
                         current_volume = max(0.0, min(1.0, current_volume))
-                        pygame.mixer.music.set_volume(current_volume)
+                        set_music_volume(current_volume)
 
             elif event.type == pygame.MOUSEBUTTONUP:
                 if event.button == 1:
@@ -120,18 +152,18 @@ def settings_menu():
                 if dragging:
                     current_volume = (mouse_pos[0] - slider_x) / slider_width
                     current_volume = max(0.0, min(1.0, current_volume))
-                    pygame.mixer.music.set_volume(current_volume)
+                    set_music_volume(current_volume)
 
         # Рисуем фон (градиент для красоты)
         draw_gradient_background(screen, (30, 10, 70), (5, 5, 30))
 
         # Заголовок
-        title = font.render("Настройки", True, (255, 255, 255))
+        title = render_text("Настройки", 50, (255, 255, 255))
         title_rect = title.get_rect(center=(WIDTH // 2, 80))
         screen.blit(title, title_rect)
 
         # Текст громкости
-        volume_text = font.render(f"Громкость: {int(current_volume * 100)}%", True, (220, 220, 220))
+        volume_text = render_dynamic("volume", f"Громкость: {int(current_volume * 100)}%", 50, (220, 220, 220))
         volume_rect = volume_text.get_rect(center=(WIDTH // 2, 150))
         screen.blit(volume_text, volume_rect)
 
@@ -143,7 +175,7 @@ def settings_menu():
         pygame.draw.rect(screen, (0, 120, 200), (slider_x, slider_y, fill_width, slider_height), border_radius=8)
 
         # Подпись о возврате
-        tip = font.render("ESC - вернуться в меню", True, (180, 180, 180))
+        tip = render_text("ESC - вернуться в меню", 50, (180, 180, 180))
         tip_rect = tip.get_rect(center=(WIDTH // 2, 350))
         screen.blit(tip, tip_rect)
 
@@ -155,13 +187,10 @@ def settings_menu():
 #  Главное меню
 # --------------------------------------------
 def main_menu():
-    pygame.mixer.music.stop()
-    pygame.mixer.music.load("src/music/back_music.mp3")
-    pygame.mixer.music.set_volume(0.1)  # Стартовая громкость
-    pygame.mixer.music.play(-1)  # -1 => играть в цикле
-
-    font_big = pygame.font.SysFont(None, 72)
-    font_small = pygame.font.SysFont(None, 50)
+    # Музыка меню (громкость — из манифеста); при первом запуске — после первого кадра
+    music_started = loader is not None
+    if music_started:
+        play_music("src/music/back_music.mp3")
 
     # Координаты и размеры "кнопок"
     start_button_rect = pygame.Rect(350, 180, 250, 60)
@@ -179,8 +208,7 @@ def main_menu():
 
             elif event.type == pygame.MOUSEBUTTONDOWN:
 
-                channel = pygame.mixer.find_channel(True)  # Найти свободный канал (или создать)
-                channel.play(sound_click)
+                play_click()
 
                 if event.button == 1:  # Левая кнопка мыши
                     if start_button_rect.collidepoint(event.pos):
@@ -197,16 +225,24 @@ def main_menu():
         draw_gradient_background(screen, (50, 50, 150), (20, 20, 60))
 
         # Заголовок
-        title_surface = font_big.render("Wizardo", True, (255, 255, 255))
+        title_surface = render_text("Wizardo", 72, (255, 255, 255))
         title_rect = title_surface.get_rect(center=(WIDTH // 2, 80))
         screen.blit(title_surface, title_rect)
 
         # Кнопки
-        draw_button(screen, start_button_rect, "Начать игру", font_small, mouse_pos)
-        draw_button(screen, settings_button_rect, "Настройки", font_small, mouse_pos)
-        draw_button(screen, quit_button_rect, "Выход", font_small, mouse_pos)
+        draw_button(screen, start_button_rect, "Начать игру", 50, mouse_pos)
+        draw_button(screen, settings_button_rect, "Настройки", 50, mouse_pos)
+        draw_button(screen, quit_button_rect, "Выход", 50, mouse_pos)
+        draw_loading_progress(screen)
 
         pygame.display.flip()
+
+        # Первый кадр уже на экране — теперь звук и фоновая загрузка
+        if not music_started:
+            start_loading()
+            play_music("src/music/back_music.mp3")
+            music_started = True
+        loader.poll()
         clock.tick(FPS)
 
 
@@ -214,7 +250,6 @@ def main_menu():
 
 def victory_screen(screen):
     """Отображает экран победы в том же окне, пока пользователь не выйдет."""
-    font = pygame.font.SysFont(None, 60)
     victory_loop = True
     while victory_loop:
         # 1) События
@@ -234,16 +269,16 @@ def victory_screen(screen):
         # 2) Рисуем фон, текст
         screen.fill((30, 30, 30))
         # Надпись "ПОБЕДА!"
-        victory_text = font.render("ПОБЕДА!", True, (255, 215, 0))
+        victory_text = render_text("ПОБЕДА!", 60, (255, 215, 0))
         victory_rect = victory_text.get_rect(center=(WIDTH // 2, HEIGHT // 2 - 50))
         screen.blit(victory_text, victory_rect)
 
         # Пример счёта (заглушка). Может быть, count_killed_enemies, etc.
-        score_text = font.render("Очки: 999", True, (255, 255, 255))
+        score_text = render_text("Очки: 999", 60, (255, 255, 255))
         score_rect = score_text.get_rect(center=(WIDTH // 2, HEIGHT // 2 + 10))
         screen.blit(score_text, score_rect)
 
-        tip_text = font.render("ESC - меню, R - перезапуск", True, (200, 200, 200))
+        tip_text = render_text("ESC - меню, R - перезапуск", 60, (200, 200, 200))
         tip_rect = tip_text.get_rect(center=(WIDTH // 2, HEIGHT // 2 + 80))
         screen.blit(tip_text, tip_rect)
 
@@ -252,175 +287,212 @@ def victory_screen(screen):
         clock.tick(FPS)
 
 
-def main_game():
-    pygame.mixer.music.stop()
-    pygame.mixer.music.load("src/music/for_battle.mp3")
-    pygame.mixer.music.set_volume(0.1)  # Стартовая громкость
-    pygame.mixer.music.play(-1)  # -1 => играть в цикле
-
-    levels = [
-        [
-            "11111111111111F1111111",
-            "1      1 P  1        1",
-            "1      1    1111111 T1",
-            "1  E   1    1        1",
-            "1           1        1",
-            "1      1    1E       1",
-            "111 111111111        1",
-            "1           1   E    1",
-            "1  E   1    S        1",
-            "1111111111111111111111"
-        ],
-        [
-            "1111111111111111111",
-            "1         P       1",
-            "1                 1",
-            "1   1         1   1",
-            "1                 1",
-            "1                 1",
-            "1   1         1   1",
-            "1       B         1",
-            "1                 1",
-            "1111111111111111111"
-        ],
-    ]
-
-    current_level = 0
-
-    screen = pygame.display.set_mode((950, 500))
-    level = Level(levels[current_level])
-
-    screen = pygame.display.set_mode((level.width, level.height))
+def main_game(seed=None, record_path=None, replay_path=None, profile=PROFILING):
+    """
+    Игровой цикл. seed — сид потоков случайности (см. rng.py); record_path — записать
+    ввод по тикам в файл повтора; replay_path — проиграть повтор: ввод берётся из файла,
+    каждый кадр — ровно один тик без ограничения FPS, в конце печатаются замеры.
+    profile — замерять фазы кадра с самого начала (иначе замеры включаются по F3);
+    при проигрывании повтора замеры идут всегда, по всем его кадрам.
+    """
+    start_loading()
+    loader.wait()  # Обычно уже всё загружено, пока игрок был в меню
+    play_music("src/music/for_battle.mp3")
+
+    # Уровни, игрок и враги живут в Game (файлы уровней — game.DEFAULT_LEVELS,
+    # разобранные карты кэшируются в levels/__cache__)
+    # Замеры по фазам кадра: F3 — включить замеры и оверлей, F4 — сохранить трассу для
+    # chrome://tracing / Perfetto. Без profile и до F3 отметки ничего не стоят (NULL_PROFILER)
+    replay = load_replay(replay_path) if replay_path else None
+    if replay:
+        # Повтор — это замер: p95/p99 печатаются в конце, история — на весь повтор
+        profiler = Profiler(budget_ms=1000 / FPS, history=max(len(replay.ticks), 1))
+    else:
+        profiler = Profiler(budget_ms=1000 / FPS) if profile else NULL_PROFILER
+    enable_profiler = False  # F3 нажата при выключенных замерах: профайлер создаётся с нового кадра
+    # Эффекты с лимитом голосов и частоты (без звукового устройства — заглушки)
+    audio = get_audio()
+    sounds = dict(sound_shoot=audio.effect("src/sounds/shoot.mp3"), sound_hit=audio.effect("src/sounds/hit.wav"))
+    if replay:
+        game = create_game(replay, profiler=profiler, prefetch=True, **sounds)
+        replay_ticks = iter(replay.ticks)
+    else:
+        if record_path and seed is None:
+            seed = random.randrange(2 ** 62)  # Запись без сида не повторить
+        game = Game(profiler=profiler, seed=seed, prefetch=True, **sounds)
+    recorder = ReplayRecorder(game.seed, game.levels, game.current_level) if record_path else None
+
+    screen = pygame.display.set_mode((game.level.width, game.level.height))
     # Загружаем изображение сердечка
-    heart_image = pygame.image.load("src/sprites/sheart.png").convert_alpha()
-    heart_image = pygame.transform.scale(heart_image, (32, 32))  # Масштабируем сердечко
+    heart_image = load_image("src/sprites/sheart.png", (32, 32))  # Масштабированное сердечко (из кэша)
 
     def draw_lives(screen, lives):
         """Рисует сердечки в правом верхнем углу."""
         for i in range(lives):
             screen.blit(heart_image, (850 - i * 40, 10))  # Отступ между сердечками
 
-    pygame.display.set_caption(f"Моя Игра - Уровень {current_level + 1}")
-
-    # Создаем игрока
-    player = Player(level.start_pos[0], level.start_pos[1], "src/sprites/wizard_tiles.png", 32,
-                    32, sound_shoot)
-    enemies = level.enemies
-
-    # Шрифт для «Game Over»
-    font_game_over = pygame.font.SysFont(None, 60)
-
-    running = True
-    while running:
-        delta_time = clock.tick(FPS)
-
-        # 1) Считываем события
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_SPACE:
-                    player.shoot()
-
-        # 2) Обновляем логику, если игрок ещё не умер (либо анимация смерти уже идёт, но не завершилась)
-        #    Важно продолжать вызывать update, чтобы кадры смерти переключались!
-
-        current_time = pygame.time.get_ticks()
-
-        player.update(delta_time, level.walls)
-
-        for trap in level.traps:
-            if (player.rect.colliderect(trap)):
-                player.rect.x, player.rect.y = level.start_pos
-        for bonus in level.bonuses:
-            if (player.rect.colliderect(bonus)):
-                player.lives += 1
-                level.bonuses.remove(bonus)
-
-        for enemy in enemies:
-            enemy.update(player, level.walls, delta_time, current_time)
-
-        for enemy in enemies:
-            if hasattr(enemy, 'is_dead'):
-                if (enemy.is_dead):
+    def lives_rects(lives):
+        """Области экрана, которые занимают сердечки."""
+        return [pygame.Rect(850 - i * 40, 10, 32, 32) for i in range(lives)]
+
+    pygame.display.set_caption(f"Моя Игра - Уровень {game.current_level + 1}")
+
+    # Необязательный режим «грязных прямоугольников»
+    renderer = DirtyRectRenderer() if DIRTY_RECT_RENDERING else None
+
+    # Симуляция идёт фиксированными тиками TICK_TIME, кадры рисуются с частотой FPS:
+    # накопленное время «выплачивается» целыми тиками, остаток — доля для интерполяции
+    accumulator = 0.0
+    shoot = False  # Выстрел ждёт ближайшего тика, даже если в этом кадре тиков нет
+
+    def finish_recording():
+        nonlocal recorder
+        if recorder:
+            recorder.save(record_path)
+            print(f"Повтор сохранён: {record_path} ({len(recorder.ticks)} тиков, сид {recorder.seed})")
+            recorder = None
+
+    try:
+        running = True
+        while running:
+            if replay:
+                clock.tick()
+                accumulator = TICK_TIME  # Повтор: ровно один тик на кадр, без ожидания
+            else:
+                accumulator += min(clock.tick(FPS), MAX_FRAME_TIME)
+            if enable_profiler:
+                enable_profiler = False
+                profiler = game.profiler = Profiler(budget_ms=1000 / FPS)
+                profiler.show_overlay = True
+                if renderer:
+                    renderer.invalidate()
+            profiler.begin_frame()
+
+            # 1) Считываем события
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    pygame.quit()
+                    sys.exit()
+
+                if event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_SPACE:
+                        shoot = True
+                    elif event.key == pygame.K_F3:
+                        if not profiler.enabled:
+                            enable_profiler = True
+                        else:
+                            profiler.show_overlay = not profiler.show_overlay
+                            if renderer:
+                                renderer.invalidate()
+                    elif event.key == pygame.K_F4 and profiler.enabled:
+                        path = profiler.export_chrome_trace(time.strftime("traces/trace-%Y%m%d-%H%M%S.json"))
+                        print(f"Трасса сохранена: {path}")
+            profiler.lap('events')
+
+            # 2) Логика фиксированными тиками (игрок, ловушки, бонусы, враги, столкновения, финиш, снаряды)
+            keys = pygame.key.get_pressed()
+            while accumulator >= TICK_TIME:
+                accumulator -= TICK_TIME
+                if replay:
+                    mask = next(replay_ticks, None)
+                    if mask is None:
+                        running = False  # Записанные тики кончились
+                        break
+                    if mask & BIT_RESTART:
+                        game.restart_level()
+                        if renderer:
+                            renderer.invalidate()
+                        continue
+                    controls = Controls.from_mask(mask)
+                else:
+                    controls = Controls.from_keys(keys, shoot)
+                    if recorder:
+                        recorder.record(controls)
+                result = game.step(controls, TICK_TIME)
+                shoot = False
+
+                if renderer:
+                    for bonus in game.collected_bonuses:
+                        renderer.invalidate(bonus)
+
+                if result == STEP_VICTORY and not replay:
                     victory_screen(screen)
-        # 3) Проверяем столкновения с врагами (уменьшаем жизни и вызываем die(), если <= 0)
-
-        for enemy in enemies:
-
-            if player.rect.colliderect(enemy.rect):
-                if not player.invincible:  # Если неуязвимость не активна
-                    player.lives -= 1
-                    sound_hit.play()
-
-                    # Включаем i-frames
-                    player.invincible = True
-                    player.invincible_timer = player.invincible_time
-
-                    if player.lives <= 0:
-                        player.die()
-                # Противника не удаляем!
-                break
-
-        # 4) Проверяем финиш
-        if level.finish_rect and player.rect.colliderect(level.finish_rect):
-            current_level += 1
-            if current_level >= len(levels):
-                print("Игра пройдена!")
-                pygame.quit()
-                sys.exit()
+                    if renderer:
+                        renderer.invalidate()
+                    clock.tick()  # Время на экране победы не «догоняем»
+                    accumulator = 0.0
+                elif result == STEP_GAME_COMPLETE:
+                    print("Игра пройдена!")
+                    if replay:
+                        running = False
+                        break
+                    pygame.quit()
+                    sys.exit()
+                elif result == STEP_LEVEL_COMPLETE:
+                    # Следующий уровень уже подготовлен в фоне; окно пересоздаём, только если сменился размер
+                    if screen.get_size() != (game.level.width, game.level.height):
+                        screen = pygame.display.set_mode((game.level.width, game.level.height))
+                    pygame.display.set_caption(f"Моя Игра - Уровень {game.current_level + 1}")
+                    if renderer:
+                        renderer.invalidate()
+
+                if game.is_over:
+                    break  # Дальше — экран «Game Over»
+
+            # 3) Отрисовка текущего кадра (фон уровня — один заранее отрисованный слой);
+            #    alpha — доля пути от прошлого тика к текущему
+            alpha = accumulator / TICK_TIME
+            level, player, enemies = game.level, game.player, game.enemies
+            if renderer:
+                renderer.begin_frame(screen, level)
             else:
-                level = Level(levels[current_level])
-                screen = pygame.display.set_mode((level.width, level.height))
-                pygame.display.set_caption(f"Моя Игра - Уровень {current_level + 1}")
-                player = Player(level.start_pos[0], level.start_pos[1], "src/sprites/wizard_tiles.png",
-                                32, 32, sound_shoot)
-                enemies = level.enemies
-
-        # 5) Обновляем снаряды
-        player.update_bullets(level.walls, enemies)
-
-        # 6) Отрисовка текущего кадра
-        screen.fill(GREEN)
-        level.draw(screen)
-
-        # Отрисовываем игрока и врагов
-        player.draw(screen)
-        player.draw_bullets(screen)
-        draw_lives(screen, player.lives)
-        for enemy in enemies:
-            enemy.draw(screen)
-
-        pygame.display.flip()
-
-        # 7) Теперь проверяем: если жизнь <= 0 и анимация смерти уже достигла последнего кадра — показываем «Game Over»
+                level.draw(screen)
+            profiler.lap('level.draw')
+
+            # Отрисовываем игрока и врагов
+            player.draw(screen, alpha)
+            player.draw_bullets(screen, alpha)
+            draw_lives(screen, player.lives)
+            for enemy in enemies:
+                enemy.draw(screen, alpha)
+            profiler.lap('entities.draw')
+
+            if profiler.show_overlay:
+                profiler.draw_overlay(screen)
+                profiler.lap('overlay')
+
+            if renderer:
+                dirty_rects = player.get_draw_rects(alpha) + lives_rects(player.lives)
+                for enemy in enemies:
+                    dirty_rects.extend(enemy.get_draw_rects(alpha))
+                if profiler.show_overlay:
+                    dirty_rects.append(profiler.overlay_rect())
+                renderer.end_frame(screen, dirty_rects)
+            else:
+                pygame.display.flip()
+            profiler.lap('display.flip')
+            profiler.end_frame()
 
-        if player.lives <= 0 and player.is_dead:
-            # Проверим, достиг ли игрок конца анимации смерти:
-            current_anim = player.animations[player.current_animation]
-            # Если мы на последнем кадре (или превысили его)
-            if player.current_frame >= len(current_anim) - 1:
-                # Запускаем под-цикл «Game Over»
+            # 4) Если жизнь <= 0 и анимация смерти дошла до последнего кадра — показываем «Game Over»
+            #    (в повторе экрана нет: следующий записанный тик — перезапуск уровня)
+            if game.is_over and not replay:
                 game_over_loop = True
                 while game_over_loop:
                     # Рисуем тот же кадр (окружение, фон) — чтобы всё оставалось на экране
-                    screen.fill(GREEN)
-                    level.draw(screen)
+                    game.level.draw(screen)
 
-                    for e in enemies:
+                    for e in game.enemies:
                         e.draw(screen)
 
                     # Рисуем игрока на последнем кадре смерти
-                    player.draw(screen)
+                    game.player.draw(screen)
 
                     # Выводим текст
-                    go_text = font_game_over.render("GAME OVER", True, (255, 0, 0))
+                    go_text = render_text("GAME OVER", 60, (255, 0, 0))
                     go_rect = go_text.get_rect(center=(screen.get_width() // 2, 100))
                     screen.blit(go_text, go_rect)
 
-                    info_text = font_game_over.render("ESC - меню, R - перезапуск", True, (255, 255, 255))
+                    info_text = render_text("ESC - меню, R - перезапуск", 60, (255, 255, 255))
                     info_rect = info_text.get_rect(center=(screen.get_width() // 2, 200))
                     screen.blit(info_text, info_rect)
 
@@ -435,22 +507,48 @@ def main_game():
                         elif ev.type == pygame.KEYDOWN:
                             if ev.key == pygame.K_ESCAPE:
                                 # Выходим в главное меню
+                                finish_recording()
                                 main_menu()
                                 main_game()
                                 return  # Полностью выходим из main_game, т.к. меню перезапустит/закроет игру
 
                             elif ev.key == pygame.K_r:
                                 # Перезапуск текущего уровня
-                                level = Level(levels[current_level])
-                                player = Player(level.start_pos[0], level.start_pos[1],
-                                                "src/sprites/wizard_tiles.png", 32, 32, sound_shoot)
-                                enemies = level.enemies
-                                player.lives = 3  # Восстанавливаем жизни
+                                game.restart_level()
+                                if recorder:
+                                    recorder.record_restart()
+                                if renderer:
+                                    renderer.invalidate()
+                                clock.tick()
+                                accumulator = 0.0
 
                                 game_over_loop = False  # выходим из «Game Over»
                 # Когда вышли из под-цикла (нажали R) — игрок/уровень пересозданы, игра продолжается
+    finally:
+        finish_recording()  # В том числе при выходе через sys.exit()
+
+    if replay:
+        print(f"Повтор проигран: {game.frame} тиков, состояние {state_digest(game)}")
+        work = profiler.work_times
+        print(f"Кадр: среднее {sum(work) / max(len(work), 1):.3f} мс, "
+              f"p95 {profiler.percentile(95, work):.3f} мс, p99 {profiler.percentile(99, work):.3f} мс")
+        for name, value in profiler.averages():
+            print(f"  {name}: {value:.3f} мс")
+    return game
 
 
 if __name__ == '__main__':
-    main_menu()
-    main_game()
+    parser = argparse.ArgumentParser(description="Моя Игра")
+    parser.add_argument("--seed", type=int, help="сид случайности (одинаковый сид — одинаковая игра)")
+    parser.add_argument("--record", metavar="PATH", help="записать ввод в файл повтора")
+    parser.add_argument("--replay", metavar="PATH", help="проиграть файл повтора (без меню, без ограничения FPS)")
+    parser.add_argument("--profile", action="store_true", default=PROFILING,
+                        help="замерять фазы кадра с самого старта (оверлей — F3, трасса — F4)")
+    args = parser.parse_args()
+    if args.record and args.seed is not None and not 0 <= args.seed <= MAX_SEED:
+        parser.error(f"для записи повтора сид должен быть от 0 до {MAX_SEED}")
+
+    init_display()
+    if not args.replay:
+        main_menu()
+    main_game(args.seed, args.record, args.replay, args.profile)
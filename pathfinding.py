@@ -0,0 +1,305 @@
+"""
+Общие структуры навигации по сетке уровня.
+"""
+import heapq
+from array import array
+from collections import deque, OrderedDict
+
+import numpy as np
+
+from level import NEIGHBOR_RIGHT, NEIGHBOR_LEFT, NEIGHBOR_DOWN, NEIGHBOR_UP
+from settings import TILE_SIZE
+
+UNREACHED = 0xFFFF  # Клетка недостижима из цели
+
+
+class FlowField:
+    """
+    Карта расстояний (BFS) от клетки игрока до всех клеток уровня.
+    Одна на уровень: пересчитывается, только когда игрок перешёл в другую клетку
+    (или изменилась карта), а каждый преследующий враг просто читает свою клетку
+    и шагает в соседнюю с меньшим расстоянием.
+    """
+
+    def __init__(self, level):
+        self.level = level
+        self.goal = None
+        self.map_version = -1
+        self.distances = array('H')
+        self.next_tiles = np.full(level.cols * level.rows, -1, dtype=np.int64)  # См. build_next_tiles
+
+    def update(self, goal_pos):
+        """Перестраивает поле к клетке под goal_pos (в пикселях), если она сменилась."""
+        level = self.level
+        goal = (int(goal_pos[0] // TILE_SIZE), int(goal_pos[1] // TILE_SIZE))
+        if goal == self.goal and self.map_version == level.map_version:
+            return
+        self.goal = goal
+        self.map_version = level.map_version
+
+        cols, rows = level.cols, level.rows
+        distances = array('H', [UNREACHED]) * (cols * rows)
+        self.distances = distances
+        gx, gy = goal
+        if not (0 <= gx < cols and 0 <= gy < rows) or level.is_solid(gx, gy):
+            self.next_tiles = np.full(cols * rows, -1, dtype=np.int64)
+            return
+
+        masks = level.neighbor_masks()
+        start = gy * cols + gx
+        distances[start] = 0
+        queue = deque([start])
+        while queue:
+            index = queue.popleft()
+            mask = masks[index]
+            next_distance = distances[index] + 1
+            # Биты маски — непроходимые соседи (края карты тоже считаются стеной)
+            for blocked_bit, neighbor in ((NEIGHBOR_RIGHT, index + 1), (NEIGHBOR_LEFT, index - 1),
+                                          (NEIGHBOR_DOWN, index + cols), (NEIGHBOR_UP, index - cols)):
+                if not mask & blocked_bit and distances[neighbor] == UNREACHED:
+                    distances[neighbor] = next_distance
+                    queue.append(neighbor)
+        self.build_next_tiles()
+
+    def distance(self, tx, ty):
+        level = self.level
+        if 0 <= tx < level.cols and 0 <= ty < level.rows and self.distances:
+            return self.distances[ty * level.cols + tx]
+        return UNREACHED
+
+    def next_tile(self, tx, ty):
+        """
+        Соседняя клетка, ближайшая к цели. None — если мы уже в клетке цели
+        или цель недостижима.
+        """
+        current = self.distance(tx, ty)
+        if current == 0 or current == UNREACHED:
+            return None
+        best, best_distance = None, current
+        for nx, ny in ((tx + 1, ty), (tx - 1, ty), (tx, ty + 1), (tx, ty - 1)):
+            d = self.distance(nx, ny)
+            if d < best_distance:
+                best, best_distance = (nx, ny), d
+        return best
+
+    def build_next_tiles(self):
+        """
+        next_tile сразу для всех клеток: массив NumPy с индексом (ty * cols + tx)
+        соседней клетки, ближайшей к цели, или -1 (тот же выбор и порядок соседей).
+        Строится вместе с полем, враги читают его по индексам своих клеток.
+        """
+        cols, rows = self.level.cols, self.level.rows
+        distances = np.frombuffer(self.distances, dtype=np.uint16).reshape(rows, cols)
+        padded = np.full((rows + 2, cols + 2), UNREACHED, dtype=np.uint16)
+        padded[1:-1, 1:-1] = distances
+        # Соседи в порядке next_tile: справа, слева, снизу, сверху; при равенстве остаётся первый
+        best = padded[1:-1, 2:]
+        offset = np.ones((rows, cols), dtype=np.int64)
+        for neighbor, step in ((padded[1:-1, :-2], -1), (padded[2:, 1:-1], cols), (padded[:-2, 1:-1], -cols)):
+            closer = neighbor < best
+            best = np.where(closer, neighbor, best)
+            offset = np.where(closer, step, offset)
+        valid = (distances != 0) & (distances != UNREACHED) & (best < distances)
+        self.next_tiles = np.where(valid, np.arange(rows * cols).reshape(rows, cols) + offset, -1).ravel()
+
+
+# Стоимость шагов A* (целые числа, диагональ ≈ √2)
+STRAIGHT_COST = 10
+DIAGONAL_COST = 14
+
+
+class NavGrid:
+    """
+    Навигационная сетка уровня: проходимость клеток и маски соседей.
+    Строится один раз на уровень и пересобирается только при изменении карты.
+    """
+
+    def __init__(self, level):
+        self.level = level
+        self.cols = level.cols
+        self.rows = level.rows
+        self.masks = level.neighbor_masks()
+        self.map_version = level.map_version
+
+    def is_stale(self):
+        return self.map_version != self.level.map_version
+
+    def is_passable(self, tx, ty):
+        return 0 <= tx < self.cols and 0 <= ty < self.rows and not self.level.is_solid(tx, ty)
+
+    def neighbors(self, index, diagonal):
+        """Соседи клетки: список (индекс соседа, стоимость шага)."""
+        cols = self.cols
+        mask = self.masks[index]
+        result = []
+        if not mask & NEIGHBOR_RIGHT:
+            result.append((index + 1, STRAIGHT_COST))
+        if not mask & NEIGHBOR_LEFT:
+            result.append((index - 1, STRAIGHT_COST))
+        if not mask & NEIGHBOR_DOWN:
+            result.append((index + cols, STRAIGHT_COST))
+        if not mask & NEIGHBOR_UP:
+            result.append((index - cols, STRAIGHT_COST))
+        if diagonal:
+            # Диагональ разрешена, только если обе прилегающие прямые клетки свободны —
+            # иначе враг «срезал» бы угол стены
+            for vertical_bit, dy in ((NEIGHBOR_DOWN, cols), (NEIGHBOR_UP, -cols)):
+                if mask & vertical_bit:
+                    continue
+                if not mask & NEIGHBOR_RIGHT and not self.masks[index + dy] & NEIGHBOR_RIGHT:
+                    result.append((index + dy + 1, DIAGONAL_COST))
+                if not mask & NEIGHBOR_LEFT and not self.masks[index + dy] & NEIGHBOR_LEFT:
+                    result.append((index + dy - 1, DIAGONAL_COST))
+        return result
+
+
+def heuristic(ax, ay, bx, by, diagonal):
+    """Манхэттенское расстояние; с диагоналями — октильное (чтобы оценка оставалась допустимой)."""
+    dx, dy = abs(ax - bx), abs(ay - by)
+    if diagonal:
+        return STRAIGHT_COST * (dx + dy) + (DIAGONAL_COST - 2 * STRAIGHT_COST) * min(dx, dy)
+    return STRAIGHT_COST * (dx + dy)
+
+
+def astar(nav, start, goal, diagonal=False):
+    """
+    Поиск пути A* между клетками start и goal.
+    Возвращает список клеток (включая start и goal) или [], если пути нет.
+    """
+    cols = nav.cols
+    if not nav.is_passable(*start) or not nav.is_passable(*goal):
+        return []
+    start_index = start[1] * cols + start[0]
+    goal_index = goal[1] * cols + goal[0]
+    gx, gy = goal
+
+    came_from = {start_index: None}
+    cost = {start_index: 0}
+    open_heap = [(heuristic(start[0], start[1], gx, gy, diagonal), 0, start_index)]
+    while open_heap:
+        _, current_cost, index = heapq.heappop(open_heap)
+        if index == goal_index:
+            break
+        if current_cost > cost[index]:
+            continue  # Устаревшая запись в куче
+        for neighbor, step in nav.neighbors(index, diagonal):
+            new_cost = current_cost + step
+            if new_cost < cost.get(neighbor, new_cost + 1):
+                cost[neighbor] = new_cost
+                came_from[neighbor] = index
+                nx, ny = neighbor % cols, neighbor // cols
+                heapq.heappush(open_heap, (new_cost + heuristic(nx, ny, gx, gy, diagonal), new_cost, neighbor))
+    else:
+        return []
+
+    # Восстанавливаем путь по came_from
+    path = []
+    index = goal_index
+    while index is not None:
+        path.append((index % cols, index // cols))
+        index = came_from[index]
+    path.reverse()
+    return path
+
+
+class PathCache:
+    """LRU-кэш недавних путей (start_tile, goal_tile) -> путь."""
+
+    def __init__(self, capacity=256):
+        self.capacity = capacity
+        self.paths = OrderedDict()
+
+    def get(self, key):
+        path = self.paths.get(key)
+        if path is not None:
+            self.paths.move_to_end(key)
+        return path
+
+    def put(self, key, path):
+        self.paths[key] = path
+        self.paths.move_to_end(key)
+        if len(self.paths) > self.capacity:
+            self.paths.popitem(last=False)  # Выбрасываем самый старый путь
+
+    def clear(self):
+        self.paths.clear()
+
+
+class Pathfinder:
+    """Поиск путей для врагов уровня: навигационная сетка + A* + LRU-кэш путей."""
+
+    def __init__(self, level, diagonal=False, cache_size=256):
+        self.level = level
+        self.diagonal = diagonal
+        self.nav = NavGrid(level)
+        self.cache = PathCache(cache_size)
+
+    def find_path(self, start_tile, goal_tile):
+        """Путь по клеткам (кортеж) или пустой кортеж, если пути нет."""
+        if self.nav.is_stale():
+            # Карта изменилась — сетку строим заново, старые пути больше не верны
+            self.nav = NavGrid(self.level)
+            self.cache.clear()
+        key = (start_tile, goal_tile)
+        path = self.cache.get(key)
+        if path is None:
+            path = tuple(astar(self.nav, start_tile, goal_tile, self.diagonal))
+            self.cache.put(key, path)
+        return path
+
+
+def line_of_sight(level, start, goal):
+    """
+    Видимость между центрами клеток start и goal: обход клеток вдоль отрезка
+    (вариант Брезенхема, который посещает все пересекаемые клетки).
+    Если отрезок проходит ровно через угол, он закрыт, только когда стены
+    стоят с обеих сторон этого угла.
+    """
+    x, y = start
+    gx, gy = goal
+    dx, dy = abs(gx - x), abs(gy - y)
+    step_x = 1 if gx > x else -1
+    step_y = 1 if gy > y else -1
+    error = dx - dy
+    dx, dy = dx * 2, dy * 2
+    remaining = (dx + dy) // 2
+    while remaining > 0:
+        if error > 0:
+            x += step_x
+            error -= dy
+        elif error < 0:
+            y += step_y
+            error += dx
+        else:
+            # Проходим через угол: щель между двумя стенами по диагонали не просматривается
+            if level.is_solid(x + step_x, y) and level.is_solid(x, y + step_y):
+                return False
+            x += step_x
+            y += step_y
+            error += dx - dy
+            remaining -= 1
+        remaining -= 1
+        if level.is_solid(x, y):
+            return False
+    return True
+
+
+class VisibilityCache:
+    """Запоминает видимость для пар клеток (враг, игрок); сбрасывается при изменении карты."""
+
+    def __init__(self, level):
+        self.level = level
+        self.map_version = level.map_version
+        self.results = {}
+
+    def visible(self, tile_a, tile_b):
+        if self.map_version != self.level.map_version:
+            self.results.clear()
+            self.map_version = self.level.map_version
+        # Видимость симметрична — храним пару в одном порядке
+        key = (tile_a, tile_b) if tile_a <= tile_b else (tile_b, tile_a)
+        result = self.results.get(key)
+        if result is None:
+            result = line_of_sight(self.level, key[0], key[1])
+            self.results[key] = result
+        return result
@@ -1,73 +1,71 @@
 import pygame
 
+from assets import load_sprite_frames
 from boss import Boss
+from controls import Controls
+from projectiles import ProjectileSystem
+from renderer import lerp_position
 from settings import WIDTH, HEIGHT
 
 
 class Player:
     def __init__(self, x, y, sprite_sheet_path, tile_width, tile_height, sound_shoot):
-        self.invincible = False  # Флаг неуязвимости
         self.invincible_time = 2000  # (мс) сколько длится неуязвимость
-        self.invincible_timer = 0  # Счётчик оставшейся неуязвимости
         self.rect = pygame.Rect(x, y, 25, 31)
         self.speed = 4
         self.sound_shoot = sound_shoot
-        self.bullets = []
+        # Пули: массивы, один отскок от стены, исчезают за краем экрана. Как и в прежнем
+        # списке, числа пуль ничто не ограничивает: при нехватке ячеек массивы растут
+        self.bullets = ProjectileSystem(64, max_bounces=1, bounds=(0, 0, WIDTH, HEIGHT), growable=True)
+
+        # Индексы анимаций:
+        # 0 - idle, 1 - walk, 6 - death, 7 - shoot (по вашему коду)
+        # Кадры общие для всех игроков: лист загружается один раз на процесс
+        self.animations = load_sprite_frames(sprite_sheet_path, tile_width, tile_height)
+        # Заранее отражённые кадры для взгляда влево
+        self.animations_flipped = load_sprite_frames(sprite_sheet_path, tile_width, tile_height, flip=True)
+        self.animation_speed = 150  # Мс на кадр
+        self.reset(x, y)
+
+    def reset(self, x, y):
+        """
+        Состояние нового игрока в точке (x, y): жизни, флаги, анимация, пули.
+        Вызывается при смене и перезапуске уровня вместо создания нового Player.
+        """
+        self.invincible = False  # Флаг неуязвимости
+        self.invincible_timer = 0  # Счётчик оставшейся неуязвимости
+        self.rect.topleft = (x, y)
+        self.previous_pos = self.rect.topleft  # Позиция на прошлом тике (для интерполяции)
+        self.bullets.clear()
         self.direction = pygame.Vector2(0, -1)  # Начальное направление (вверх)
         self.facing_right = True  # Направление взгляда (True = вправо)
         self.is_shooting = False  # Флаг анимации стрельбы
         self.is_dead = False  # Флаг анимации смерти
         self.lives = 5
-
-        # Индексы анимаций:
-        # 0 - idle, 1 - walk, 6 - death, 7 - shoot (по вашему коду)
-        self.animations = self.load_sprite_sheet(sprite_sheet_path, tile_width, tile_height)
         self.current_animation = 0
         self.current_frame = 0
         self.frame_timer = 0
-        self.animation_speed = 150  # Мс на кадр
-
-    def load_sprite_sheet(self, filepath, tile_width, tile_height):
-        """Загружает и разбивает спрайтовый лист на кадры, пропуская пустые кадры."""
-        sheet = pygame.image.load(filepath).convert_alpha()
-        sheet_width, sheet_height = sheet.get_size()
-        sprites = []
-
-        for y in range(0, sheet_height, tile_height):
-            row = []
-            for x in range(0, sheet_width, tile_width):
-                rect = pygame.Rect(x, y, tile_width, tile_height)
-                frame = sheet.subsurface(rect)
-                if not self.is_frame_empty(frame):
-                    row.append(frame)
-            sprites.append(row)
-        return sprites
-
-    def is_frame_empty(self, frame):
-        """Проверяет, является ли кадр пустым (все пиксели прозрачные)."""
-        for x in range(frame.get_width()):
-            for y in range(frame.get_height()):
-                # Альфа-канал > 0 означает, что пиксель не полностью прозрачный
-                if frame.get_at((x, y))[3] > 0:
-                    return False
-        return True
 
-    def move(self, walls):
-        """Двигается, если жив. Стрельба (is_shooting) — не блокирует движение."""
+    def move(self, level, controls=None):
+        """
+        Двигается, если жив. Стрельба (is_shooting) — не блокирует движение.
+        controls — состояние управления (см. controls.Controls); без него читается клавиатура.
+        """
         if self.is_dead:
             return  # Не двигаемся, если мертвы
 
-        keys = pygame.key.get_pressed()
+        if controls is None:
+            controls = Controls.from_keys(pygame.key.get_pressed())
         movement = pygame.Vector2(0, 0)
 
-        if keys[pygame.K_w] or keys[pygame.K_UP]:
+        if controls.up:
             movement.y -= 1
-        if keys[pygame.K_s] or keys[pygame.K_DOWN]:
+        if controls.down:
             movement.y += 1
-        if keys[pygame.K_a] or keys[pygame.K_LEFT]:
+        if controls.left:
             movement.x -= 1
             self.facing_right = False
-        if keys[pygame.K_d] or keys[pygame.K_RIGHT]:
+        if controls.right:
             movement.x += 1
             self.facing_right = True
 
@@ -85,9 +83,18 @@ class Player:
         # Коллизии (x, y)
         old_rect = self.rect.inflate(-1, -1)
         self.rect.x += movement.x
-        self.collide(walls, 'x', old_rect)
+        self.collide(level, 'x', old_rect)
         self.rect.y += movement.y
-        self.collide(walls, 'y', old_rect)
+        self.collide(level, 'y', old_rect)
+
+    def save_state(self):
+        """Запоминает позиции игрока и его пуль перед тиком симуляции."""
+        self.previous_pos = self.rect.topleft
+        self.bullets.save_positions()
+
+    def draw_position(self, alpha=1.0):
+        """Левый верхний угол спрайта между прошлым и текущим тиком."""
+        return lerp_position(self.previous_pos, self.rect.topleft, alpha)
 
     def set_animation(self, animation_index):
         """Меняем анимацию. Сбрасываем кадр в 0, если это новая анимация."""
@@ -122,14 +129,13 @@ class Player:
                     # Для walk / idle — зацикливаем
                     self.current_frame = 0
 
-    def collide(self, walls, direction, old_rect):
-        """Не даём игроку пройти сквозь стены."""
-        for wall in walls:
-            if self.rect.colliderect(wall):
-                if direction == 'x':
-                    self.rect.x = old_rect.x
-                elif direction == 'y':
-                    self.rect.y = old_rect.y
+    def collide(self, level, direction, old_rect):
+        """Не даём игроку пройти сквозь стены (проверяем только тайлы под игроком)."""
+        if level.collides_with_wall(self.rect):
+            if direction == 'x':
+                self.rect.x = old_rect.x
+            elif direction == 'y':
+                self.rect.y = old_rect.y
 
     def shoot(self):
 
@@ -154,89 +160,38 @@ class Player:
         """Создаёт снаряд (пуля) в направлении self.direction."""
         offset = self.direction * (self.rect.width // 2 + 5)
         bullet_pos = pygame.Vector2(self.rect.center) + offset
+        self.bullets.spawn(int(bullet_pos.x - 5), int(bullet_pos.y - 5), self.direction.x, self.direction.y, 10)
 
-        bullet = {
-            'bounced': False,
-            'rect': pygame.Rect(bullet_pos.x - 5, bullet_pos.y - 5, 10, 10),
-            'direction': self.direction.copy()
-        }
-        self.bullets.append(bullet)
-
-    def update_bullets(self, walls, enemies):
-        """Обновляем полёт пуль, проверяем столкновения со стенами/врагами/игроком."""
+    def update_bullets(self, level, enemies):
+        """Обновляем полёт пуль, проверяем столкновения с врагами и стенами."""
         if self.is_dead:
             return  # Если игрок мертв, не двигаем его пули
 
-        bullets_to_remove = []
-        for bullet in self.bullets:
-            # Движение пули
-            bullet['rect'].x += bullet['direction'].x * 10
-            bullet['rect'].y += bullet['direction'].y * 10
-
-            # Столкновение с врагами
-            for enemy in enemies:
-                if bullet['rect'].colliderect(enemy.rect):
-                    bullets_to_remove.append(bullet)  # пуля исчезает
-
-                    if isinstance(enemy, Boss):
-                        # Если это босс, уменьшаем здоровье
-                        enemy.take_damage(1)
-                        # Если босс погиб после урона, только тогда удаляем
-
-                    else:
-                        # Обычный враг умирает мгновенно
-                        if enemy in enemies:
-                            enemies.remove(enemy)
-
-                    # Выходим из цикла, т.к. пуля уже потрачена
-                    break
-
-            # Столкновение со стенами (отскок один раз)
-            for wall in walls:
-                if bullet['rect'].colliderect(wall):
-                    if bullet['bounced']:
-                        bullets_to_remove.append(bullet)
-                    else:
-                        dx = bullet['rect'].centerx - wall.centerx
-                        dy = bullet['rect'].centery - wall.centery
-                        if abs(dx) > abs(dy):  # Горизонтальное столкновение
-                            bullet['direction'].x *= -1
-                        else:  # Вертикальное столкновение
-                            bullet['direction'].y *= -1
-                        bullet['bounced'] = True
-                    break
-
-            # Попадание в самого себя
-            # if bullet['rect'].colliderect(self.rect):
-            # bullets_to_remove.append(bullet)
-            # if not self.invincible:  # Если неуязвимость не активна
-            # self.lives -= 1
-
-            # Включаем i-frames
-            # self.invincible = True
-            # self.invincible_timer = self.invincible_time
-
-            # if self.lives <= 0:
-            #    self.die()
-
-            # break
-
-            # Проверяем выход за границы
-            if (bullet['rect'].x < 0 or bullet['rect'].x > WIDTH or
-                    bullet['rect'].y < 0 or bullet['rect'].y > HEIGHT):
-                bullets_to_remove.append(bullet)
-
-        # Удаляем нужные пули
-        for bullet in bullets_to_remove:
-            if bullet in self.bullets:
-                self.bullets.remove(bullet)
-
-    def draw_bullets(self, screen):
+        self.bullets.advance()
+
+        # Столкновение с врагами: одна проверка collidelist на пулю
+        killed = []
+        for slot, target in self.bullets.hits([enemy.rect for enemy in enemies]):
+            self.bullets.kill(slot)  # пуля исчезает
+            enemy = enemies[target]
+            if isinstance(enemy, Boss):
+                # Если это босс, уменьшаем здоровье
+                enemy.take_damage(1)
+            elif enemy not in killed:
+                # Обычный враг умирает мгновенно
+                killed.append(enemy)
+        for enemy in killed:
+            enemies.remove(enemy)
+            enemy.kill()
+
+        # Стены (отскок один раз) и выход за границы
+        self.bullets.resolve(level)
+
+    def draw_bullets(self, screen, alpha=1.0):
         """Рисуем все пули (простой прямоугольник)."""
-        for bullet in self.bullets:
-            pygame.draw.rect(screen, (0, 0, 255), bullet['rect'])
+        self.bullets.draw(screen, (0, 0, 255), alpha)
 
-    def draw(self, screen):
+    def draw(self, screen, alpha=1.0):
         if self.invincible:
             # Мигаем с некоторой частотой
             # (Например, раз в 200 мс скрываем спрайт)
@@ -244,19 +199,25 @@ class Player:
             if t % 2 == 0:
                 # Рисуем обычный спрайт
                 frame = self.animations[self.current_animation][self.current_frame]
-                screen.blit(frame, self.rect.topleft)
+                screen.blit(frame, self.draw_position(alpha))
             else:
                 # Пропускаем кадр, не рисуем (эффект мигания)
                 pass
         else:
-            # Обычная отрисовка
-            frame = self.animations[self.current_animation][self.current_frame]
-            if not self.facing_right:
-                frame = pygame.transform.flip(frame, True, False)
-            screen.blit(frame, self.rect.topleft)
+            # Обычная отрисовка (отражённый кадр берём из заранее подготовленных)
+            animations = self.animations if self.facing_right else self.animations_flipped
+            frame = animations[self.current_animation][self.current_frame]
+            screen.blit(frame, self.draw_position(alpha))
         """Рисуем нужный кадр анимации (учитывая направление)."""
 
-    def update(self, delta_time, walls):
+    def get_draw_rects(self, alpha=1.0):
+        """Прямоугольники экрана, которые затрагивают draw и draw_bullets."""
+        frame = self.animations[self.current_animation][self.current_frame]
+        rects = [pygame.Rect(self.draw_position(alpha), frame.get_size())]
+        rects.extend(self.bullets.rects(alpha))
+        return rects
+
+    def update(self, delta_time, level, controls=None):
         """Главный метод, вызывается каждый кадр для обновления логики игрока."""
         # Снижаем таймер неуязвимости
         if self.invincible:
@@ -265,5 +226,5 @@ class Player:
                 self.invincible_timer = 0
                 self.invincible = False
 
-        self.move(walls)
+        self.move(level, controls)
         self.update_animation(delta_time)
@@ -0,0 +1,50 @@
+"""
+Подготовка уровней в фоновом потоке.
+
+Разбор уровня (кэш сетки, поле путей, поиск пути, видимость, пул врагов,
+создание врагов и босса) занимает заметную часть кадра. Game заранее
+заказывает следующий уровень и свежую копию текущего (для перезапуска),
+а при переходе забирает готовый объект — если поток не успел, take()
+дождётся его, а при ошибке вернёт None, и уровень соберётся как раньше.
+
+Сборка в потоке детерминирована так же, как синхронная: каждый уровень
+получает свой набор потоков случайности (см. rng.py). Кадры врагов
+должны быть загружены заранее в главном потоке (level.preload_sprites).
+"""
+import threading
+
+
+class LevelPrefetcher:
+    def __init__(self):
+        self._jobs = {}  # ключ -> (поток, словарь с результатом)
+
+    def request(self, key, build):
+        """Запускает build() в фоне, если по ключу ещё ничего не заказано."""
+        if key in self._jobs:
+            return
+        result = {}
+
+        def run():
+            try:
+                result['value'] = build()
+            except Exception as error:  # Соберём синхронно и получим ошибку там
+                result['error'] = error
+
+        thread = threading.Thread(target=run, name=f"level-prefetch-{key}", daemon=True)
+        self._jobs[key] = (thread, result)
+        thread.start()
+
+    def take(self, key):
+        """Готовый объект по ключу (ждёт поток при необходимости) или None."""
+        job = self._jobs.pop(key, None)
+        if job is None:
+            return None
+        thread, result = job
+        thread.join()
+        return result.get('value')
+
+    def keep_only(self, keys):
+        """Забывает заказы, которые больше не понадобятся (потоки доработают сами)."""
+        for key in list(self._jobs):
+            if key not in keys:
+                del self._jobs[key]
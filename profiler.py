@@ -0,0 +1,169 @@
+"""
+Замеры времени по фазам кадра.
+
+Кадр размечается «кругами»: begin_frame() в начале, lap(имя) после каждой
+фазы (время с предыдущей отметки записывается на эту фазу), end_frame() в конце.
+Одна отметка — это perf_counter_ns и пара операций со списком, поэтому
+профайлер можно держать включённым всегда.
+
+По накопленным кадрам считаются средние по фазам и p95/p99 времени кадра,
+оверлей (F3 в игре) показывает их вместе с графиком времени кадра, а
+export_chrome_trace() сохраняет последние кадры в JSON формата Chrome trace
+(открывается в chrome://tracing и ui.perfetto.dev).
+"""
+import json
+import os
+import time
+from collections import deque
+
+import pygame
+
+from ui import render_dynamic
+
+OVERLAY_WIDTH = 300
+GRAPH_HEIGHT = 60
+GRAPH_MAX_MS = 33.3  # Верх графика — два бюджета кадра при 60 FPS
+
+
+class NullProfiler:
+    """Профайлер, который ничего не делает (по умолчанию в Game и headless-прогонах)."""
+    enabled = False
+    show_overlay = False
+
+    def begin_frame(self):
+        pass
+
+    def lap(self, name):
+        pass
+
+    def end_frame(self):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
+
+
+class Profiler:
+    enabled = True
+
+    def __init__(self, budget_ms=1000 / 60, history=300, trace_events=200000):
+        self.budget_ms = budget_ms  # Бюджет кадра (линия на графике)
+        self.frame_times = deque(maxlen=history)  # Время между началами кадров, мс
+        self.work_times = deque(maxlen=history)  # Время работы кадра (без ожидания clock.tick), мс
+        self.phase_times = {}  # фаза -> deque времени за кадр, мс
+        self.trace = deque(maxlen=trace_events)  # (фаза, начало, длительность) в нс
+        self.show_overlay = False
+
+        self._origin = time.perf_counter_ns()
+        self._frame_start = None
+        self._last = 0
+        self._current = {}  # Время фаз текущего кадра, нс
+        self._panel = None
+
+    # -------------------------------
+    #   Разметка кадра
+    # -------------------------------
+    def begin_frame(self):
+        now = time.perf_counter_ns()
+        if self._frame_start is not None:
+            self.frame_times.append((now - self._frame_start) / 1e6)
+        self._frame_start = now
+        self._last = now
+        self._current = {}
+
+    def lap(self, name):
+        """Записывает время с предыдущей отметки на фазу name."""
+        now = time.perf_counter_ns()
+        duration = now - self._last
+        self._current[name] = self._current.get(name, 0) + duration
+        self.trace.append((name, self._last, duration))
+        self._last = now
+
+    def end_frame(self):
+        work = self._last - self._frame_start
+        self.work_times.append(work / 1e6)
+        self.trace.append(('frame', self._frame_start, work))
+        history = self.work_times.maxlen
+        for name, duration in self._current.items():
+            times = self.phase_times.get(name)
+            if times is None:
+                times = self.phase_times[name] = deque(maxlen=history)
+            times.append(duration / 1e6)
+
+    # -------------------------------
+    #   Статистика
+    # -------------------------------
+    def percentile(self, percent, times=None):
+        """Перцентиль времени кадра (мс) по последним кадрам."""
+        times = sorted(self.frame_times if times is None else times)
+        if not times:
+            return 0.0
+        index = min(len(times) - 1, int(len(times) * percent / 100))
+        return times[index]
+
+    def averages(self):
+        """Средние по фазам за последние кадры, мс (самые дорогие первыми)."""
+        result = [(name, sum(times) / len(times)) for name, times in self.phase_times.items() if times]
+        result.sort(key=lambda item: item[1], reverse=True)
+        return result
+
+    # -------------------------------
+    #   Экспорт
+    # -------------------------------
+    def export_chrome_trace(self, path):
+        """Сохраняет последние отметки в JSON для chrome://tracing / Perfetto."""
+        events = [{
+            'name': name,
+            'ph': 'X',
+            'ts': (start - self._origin) / 1000,  # мкс
+            'dur': duration / 1000,
+            'pid': 1,
+            'tid': 1,
+        } for name, start, duration in self.trace]
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+        return path
+
+    # -------------------------------
+    #   Оверлей
+    # -------------------------------
+    def overlay_rect(self):
+        lines = 2 + len(self.phase_times)
+        return pygame.Rect(5, 5, OVERLAY_WIDTH, 10 + lines * 18 + GRAPH_HEIGHT + 10)
+
+    def draw_overlay(self, screen):
+        """Полупрозрачная панель со средними по фазам, p95/p99 и графиком времени кадра."""
+        rect = self.overlay_rect()
+        if self._panel is None or self._panel.get_size() != rect.size:
+            self._panel = pygame.Surface(rect.size, pygame.SRCALPHA)
+            self._panel.fill((0, 0, 0, 170))
+        screen.blit(self._panel, rect)
+
+        work = self.work_times
+        average = sum(work) / len(work) if work else 0.0
+        lines = [
+            (f"кадр: {average:.2f} мс  p95 {self.percentile(95, work):.2f}  p99 {self.percentile(99, work):.2f}",
+             (255, 255, 255)),
+            (f"интервал: p95 {self.percentile(95):.2f}  p99 {self.percentile(99):.2f} мс", (200, 200, 200)),
+        ]
+        for name, value in self.averages():
+            color = (255, 120, 120) if value > self.budget_ms / 2 else (200, 200, 200)
+            lines.append((f"{name}: {value:.3f} мс", color))
+
+        y = rect.y + 5
+        for slot, (text, color) in enumerate(lines):
+            screen.blit(render_dynamic(('profiler', slot), text, 20, color), (rect.x + 5, y))
+            y += 18
+
+        # График времени работы кадра; красная линия — бюджет
+        graph = pygame.Rect(rect.x + 5, rect.bottom - GRAPH_HEIGHT - 5, rect.width - 10, GRAPH_HEIGHT)
+        budget_y = graph.bottom - int(graph.height * min(self.budget_ms / GRAPH_MAX_MS, 1.0))
+        pygame.draw.line(screen, (200, 60, 60), (graph.left, budget_y), (graph.right, budget_y))
+        if len(work) > 1:
+            step = graph.width / (work.maxlen - 1)
+            points = [(graph.left + i * step, graph.bottom - graph.height * min(value / GRAPH_MAX_MS, 1.0))
+                      for i, value in enumerate(work)]
+            pygame.draw.lines(screen, (120, 255, 120), False, points)
@@ -0,0 +1,244 @@
+"""
+Пули игрока и босса в массивах NumPy.
+
+Вместо списков словарей {'rect', 'direction'} все снаряды одного владельца
+лежат в массивах NumPy (позиция, направление, скорость, отскоки, возраст),
+а освободившиеся ячейки переиспользуются через список свободных индексов.
+Каждая фаза кадра — несколько операций над массивами сразу для всех живых пуль
+(индексы живых ячеек — в self.active, в порядке выстрелов), без цикла по пулям.
+Удаление — пометка ячейки, из активных она уходит в compact().
+
+Порядок за кадр у владельца:
+    advance()          — сдвинуть все пули
+    hits(rects)        — попадания по целям (первая задетая цель из списка)
+    resolve(level)     — стены (отскок или уничтожение), границы и время жизни
+"""
+import numpy as np
+import pygame
+
+from settings import TILE_SIZE
+
+# Столбцы пуль: имя -> тип элемента
+COLUMNS = (
+    ('x', np.float64), ('y', np.float64),
+    # Позиции на прошлом тике (для интерполяции при отрисовке)
+    ('prev_x', np.float64), ('prev_y', np.float64),
+    ('dx', np.float64), ('dy', np.float64), ('speed', np.float64),
+    ('bounces', np.int8), ('age', np.int32), ('alive', np.bool_),
+)
+
+
+class ProjectileSystem:
+    """Пули одного владельца. size должен быть меньше TILE_SIZE (стены проверяются по углам пули)."""
+
+    def __init__(self, capacity, size=10, max_bounces=0, bounds=None, lifetime=None, growable=False):
+        self.capacity = capacity
+        self.growable = growable  # Удваивать массивы, когда ячейки кончились (иначе новые пули теряются)
+        self.size = size
+        self.max_bounces = max_bounces  # Сколько раз пуля может отскочить от стены
+        self.bounds = bounds  # (left, top, right, bottom) — за ними пуля исчезает
+        self.lifetime = lifetime  # Время жизни в кадрах (None — без ограничения)
+
+        for name, dtype in COLUMNS:
+            setattr(self, name, np.zeros(capacity, dtype=dtype))
+
+        self.free = list(range(capacity - 1, -1, -1))  # Стек свободных ячеек
+        self.active = np.zeros(0, dtype=np.int64)  # Живые ячейки в порядке выстрелов
+
+    def __len__(self):
+        return len(self.active)
+
+    def clear(self):
+        self.alive[self.active] = False
+        self.free.extend(self.active.tolist())
+        self.active = self.active[:0]
+
+    def grow(self, needed=1):
+        """Удваивает ёмкость, пока свободных ячеек не станет хотя бы needed."""
+        old = self.capacity
+        new = old
+        while new - old + len(self.free) < needed:
+            new = max(new * 2, 1)
+        extra = new - old
+        for name, dtype in COLUMNS:
+            setattr(self, name, np.concatenate((getattr(self, name), np.zeros(extra, dtype=dtype))))
+        # Новые ячейки — под уже свободными, младшие выдаются первыми
+        self.free[:0] = range(new - 1, old - 1, -1)
+        self.capacity = new
+
+    # -------------------------------
+    #   Создание и удаление
+    # -------------------------------
+    def spawn(self, x, y, dx, dy, speed):
+        """Новая пуля с левым верхним углом в (x, y). Возвращает ячейку или -1, если мест нет."""
+        if not self.free:
+            if not self.growable:
+                return -1
+            self.grow()
+        slot = self.free.pop()
+        self.x[slot] = self.prev_x[slot] = x
+        self.y[slot] = self.prev_y[slot] = y
+        self.dx[slot] = dx
+        self.dy[slot] = dy
+        self.speed[slot] = speed
+        self.bounces[slot] = 0
+        self.age[slot] = 0
+        self.alive[slot] = True
+        self.active = np.append(self.active, slot)
+        return slot
+
+    def spawn_many(self, x, y, directions, speed):
+        """
+        Залп из одной точки: по пуле на каждое направление (массив n x 2 или список (dx, dy)).
+        Ячейки берутся из свободных одним срезом и заполняются записью по массиву индексов.
+        Возвращает число созданных пуль.
+        """
+        directions = np.asarray(directions, dtype=np.float64).reshape(-1, 2)
+        if self.growable and len(directions) > len(self.free):
+            self.grow(len(directions))
+        count = min(len(directions), len(self.free))
+        if count == 0:
+            return 0
+        slots = np.array(self.free[-count:], dtype=np.int64)
+        del self.free[-count:]
+        self.x[slots] = self.prev_x[slots] = x
+        self.y[slots] = self.prev_y[slots] = y
+        self.dx[slots] = directions[:count, 0]
+        self.dy[slots] = directions[:count, 1]
+        self.speed[slots] = speed
+        self.bounces[slots] = 0
+        self.age[slots] = 0
+        self.alive[slots] = True
+        self.active = np.concatenate((self.active, slots))
+        return count
+
+    def kill(self, slot):
+        """
+        Помечает пулю удалённой. Из списка активных (и в свободные ячейки)
+        она уйдёт в resolve() — до этого ячейка не может быть выдана повторно.
+        """
+        self.alive[slot] = False
+
+    # -------------------------------
+    #   Обновление
+    # -------------------------------
+    def save_positions(self):
+        """Запоминает текущие позиции как позиции прошлого тика (копия массивов целиком)."""
+        self.prev_x[:] = self.x
+        self.prev_y[:] = self.y
+
+    def advance(self):
+        """Сдвигает все активные пули на direction * speed."""
+        active = self.active
+        speed = self.speed[active]
+        self.x[active] += self.dx[active] * speed
+        self.y[active] += self.dy[active] * speed
+        self.age[active] += 1
+
+    def hits(self, rects):
+        """
+        Попадания по списку прямоугольников целей: [(ячейка пули, индекс цели), ...].
+        Для каждой пули берётся первая цель из списка, с которой она пересеклась
+        (как у Rect.collidelist), все пары пуля — цель проверяются одной операцией.
+        """
+        live = self.active[self.alive[self.active]]
+        if not rects or not len(live):
+            return []
+        targets = np.array([tuple(rect) for rect in rects], dtype=np.int64)
+        left, top = targets[:, 0], targets[:, 1]
+        right, bottom = left + targets[:, 2], top + targets[:, 3]
+        size = self.size
+        x = self.x[live].astype(np.int64)[:, np.newaxis]
+        y = self.y[live].astype(np.int64)[:, np.newaxis]
+        # Пересечение прямоугольников (цели нулевого размера ни с чем не пересекаются)
+        overlap = ((x < right) & (x + size > left) & (y < bottom) & (y + size > top)
+                   & (targets[:, 2] > 0) & (targets[:, 3] > 0))
+        hit = overlap.any(axis=1)
+        return list(zip(live[hit].tolist(), overlap[hit].argmax(axis=1).tolist()))
+
+    def resolve(self, level):
+        """Стены (по сетке уровня), границы и время жизни; убирает мёртвые пули из активных."""
+        live = self.active[self.alive[self.active]]
+        if len(live):
+            self.resolve_walls(live, level)
+            left = self.x[live].astype(np.int64)
+            top = self.y[live].astype(np.int64)
+            dead = np.zeros(len(live), dtype=bool)
+            if self.bounds is not None:
+                min_x, min_y, max_x, max_y = self.bounds
+                dead |= (left < min_x) | (left > max_x) | (top < min_y) | (top > max_y)
+            if self.lifetime is not None:
+                dead |= self.age[live] >= self.lifetime
+            self.alive[live[dead]] = False
+        self.compact()
+
+    def resolve_walls(self, live, level):
+        """Пули, задевшие стену, отскакивают (пока есть отскоки) или исчезают."""
+        size = self.size
+        x, y = self.x[live], self.y[live]
+        # Пуля меньше тайла, поэтому достаточно проверить клетки под её углами
+        x0, x1, y0, y1 = level.corner_cells(x, y, size)
+        walls, width = level.wall_grid(), level.cols + 2
+        corners = (walls[y0 * width + x0], walls[y0 * width + x1], walls[y1 * width + x0], walls[y1 * width + x1])
+        hit_wall = corners[0] | corners[1] | corners[2] | corners[3]
+        if not hit_wall.any():
+            return
+        bounces = self.bounces[live]
+        spent = hit_wall & (bounces >= self.max_bounces)
+        self.alive[live[spent]] = False
+
+        bouncing = hit_wall & ~spent
+        if not bouncing.any():
+            return
+        # Отскок от первой задетой стены (порядок углов — как у walls_in_rect):
+        # по оси, где смещение от её центра больше
+        wall_x = np.select(corners, (x0, x1, x0, x1))[bouncing] - 1
+        wall_y = np.select(corners, (y0, y0, y1, y1))[bouncing] - 1
+        half = TILE_SIZE / 2
+        offset_x = x[bouncing].astype(np.int64) + size // 2 - (wall_x * TILE_SIZE + half)
+        offset_y = y[bouncing].astype(np.int64) + size // 2 - (wall_y * TILE_SIZE + half)
+        horizontal = np.abs(offset_x) > np.abs(offset_y)
+        slots = live[bouncing]
+        self.dx[slots[horizontal]] *= -1
+        self.dy[slots[~horizontal]] *= -1
+        self.bounces[slots] += 1
+
+    def compact(self):
+        """Убирает мёртвые пули из активных и возвращает их ячейки в свободные."""
+        alive = self.alive[self.active]
+        if not alive.all():
+            self.free.extend(self.active[~alive].tolist())
+            self.active = self.active[alive]
+
+    # -------------------------------
+    #   Чтение для отрисовки и уклонения
+    # -------------------------------
+    def positions(self, alpha=1.0):
+        """Целые позиции активных пуль; alpha < 1 — между прошлым и текущим тиком."""
+        active = self.active
+        x, y = self.x[active], self.y[active]
+        if alpha != 1.0:
+            prev_x, prev_y = self.prev_x[active], self.prev_y[active]
+            x = prev_x + (x - prev_x) * alpha
+            y = prev_y + (y - prev_y) * alpha
+        return x.astype(np.int64).tolist(), y.astype(np.int64).tolist()
+
+    def rect(self, slot, alpha=1.0):
+        """Прямоугольник пули; alpha < 1 — между прошлым и текущим тиком."""
+        x, y = self.x[slot], self.y[slot]
+        if alpha != 1.0:
+            x = self.prev_x[slot] + (x - self.prev_x[slot]) * alpha
+            y = self.prev_y[slot] + (y - self.prev_y[slot]) * alpha
+        return pygame.Rect(int(x), int(y), self.size, self.size)
+
+    def rects(self, alpha=1.0):
+        size = self.size
+        return [pygame.Rect(x, y, size, size) for x, y in zip(*self.positions(alpha))]
+
+    def centers(self):
+        half = self.size // 2
+        return [(x + half, y + half) for x, y in zip(*self.positions())]
+
+    def draw(self, screen, color, alpha=1.0):
+        for rect in self.rects(alpha):
+            pygame.draw.rect(screen, color, rect)
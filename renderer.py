@@ -0,0 +1,50 @@
+import pygame
+
+
+def lerp_position(previous, current, alpha):
+    """
+    Позиция для отрисовки между двумя последними тиками симуляции
+    (alpha = 0 — прошлый тик, 1 — текущий).
+    """
+    return (int(previous[0] + (current[0] - previous[0]) * alpha),
+            int(previous[1] + (current[1] - previous[1]) * alpha))
+
+
+class DirtyRectRenderer:
+    """
+    Отрисовка «грязными прямоугольниками».
+    Вместо полной перерисовки кадра и pygame.display.flip() восстанавливаем фон уровня
+    только под объектами прошлого кадра и отправляем на экран только изменившиеся области.
+    """
+
+    def __init__(self):
+        self.previous_rects = []  # Что рисовали в прошлом кадре
+        self.invalid_rects = []  # Области, которые изменились помимо объектов (например, бонус)
+        self.full_redraw = True  # Первый кадр (и смена уровня) — рисуем целиком
+
+    def invalidate(self, rect=None):
+        """Помечает область (или весь экран, если rect не задан) для перерисовки."""
+        if rect is None:
+            self.full_redraw = True
+        else:
+            self.invalid_rects.append(pygame.Rect(rect))
+
+    def begin_frame(self, screen, level):
+        """Стирает объекты прошлого кадра, восстанавливая под ними фон уровня."""
+        if self.full_redraw:
+            level.draw(screen)
+            return
+        for rect in self.previous_rects + self.invalid_rects:
+            screen.blit(level.background, rect, rect)
+
+    def end_frame(self, screen, current_rects):
+        """Отправляет на экран старые и новые области объектов."""
+        screen_rect = screen.get_rect()
+        current_rects = [screen_rect.clip(rect) for rect in current_rects]
+        if self.full_redraw:
+            pygame.display.flip()
+            self.full_redraw = False
+        else:
+            pygame.display.update(self.previous_rects + self.invalid_rects + current_rects)
+        self.previous_rects = current_rects
+        self.invalid_rects = []
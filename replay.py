@@ -0,0 +1,149 @@
+"""
+Запись и воспроизведение ввода по тикам.
+
+Игра детерминирована при одном сиде (см. rng.py) и фиксированном шаге
+(settings.TICK_TIME), поэтому для повтора партии достаточно сохранить сид,
+список уровней и управление на каждом тике. Управление пишется битовой
+маской (controls.BIT_*), а одинаковые подряд маски сворачиваются в пары
+(повторы, маска) — минута игры обычно занимает десятки байт.
+
+Запись:        python main.py --record replays/boss.rpl
+Повтор в окне: python main.py --replay replays/boss.rpl
+Без окна:      python headless.py --replay replays/boss.rpl
+"""
+import hashlib
+import os
+import struct
+from collections import namedtuple
+
+from controls import Controls
+from game import Game, STEP_GAME_COMPLETE
+from profiler import NULL_PROFILER
+from settings import TICK_TIME
+
+REPLAY_MAGIC = b"WRPL"
+REPLAY_VERSION = 1
+# magic, версия, сид (целое 0..2**64-1), длительность тика (мс), стартовый уровень, число файлов уровней
+HEADER = struct.Struct("<4sHQdHH")
+LEVEL_PATH = struct.Struct("<H")  # длина пути в байтах, затем сам путь (utf-8)
+RUN_COUNT = struct.Struct("<I")
+RUN = struct.Struct("<HB")  # повторы, маска
+MAX_SEED = 2 ** 64 - 1
+
+BIT_RESTART = 32  # Перезапуск уровня после «Game Over» вместо тика
+
+Replay = namedtuple("Replay", "seed tick_time start_level levels ticks")
+
+
+class ReplayRecorder:
+    def __init__(self, seed, levels, start_level=0, tick_time=TICK_TIME):
+        # Проверяем сразу, а не при сохранении — иначе записанная партия пропадёт
+        if not isinstance(seed, int) or not 0 <= seed <= MAX_SEED:
+            raise ValueError(f"Сид для записи повтора должен быть целым от 0 до {MAX_SEED}: {seed!r}")
+        self.seed = seed
+        self.levels = list(levels)
+        self.start_level = start_level
+        self.tick_time = tick_time
+        self.ticks = []  # Маска на каждый тик
+
+    def record(self, controls):
+        self.ticks.append(controls.to_mask())
+
+    def record_restart(self):
+        self.ticks.append(BIT_RESTART)
+
+    def save(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        save_replay(path, Replay(self.seed, self.tick_time, self.start_level, self.levels, self.ticks))
+
+
+# -------------------------------
+#   Файл
+# -------------------------------
+def save_replay(path, replay):
+    runs = []
+    for mask in replay.ticks:
+        if runs and runs[-1][1] == mask and runs[-1][0] < 0xFFFF:
+            runs[-1][0] += 1
+        else:
+            runs.append([1, mask])
+
+    parts = [HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, replay.seed, replay.tick_time,
+                         replay.start_level, len(replay.levels))]
+    for level_path in replay.levels:
+        encoded = level_path.encode("utf-8")
+        parts.append(LEVEL_PATH.pack(len(encoded)))
+        parts.append(encoded)
+    parts.append(RUN_COUNT.pack(len(runs)))
+    parts.extend(RUN.pack(count, mask) for count, mask in runs)
+    with open(path, "wb") as f:
+        f.write(b"".join(parts))
+
+
+def load_replay(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, seed, tick_time, start_level, level_count = HEADER.unpack_from(data)
+    if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+        raise ValueError(f"{path}: не файл повтора или другая версия формата")
+    offset = HEADER.size
+    levels = []
+    for _ in range(level_count):
+        (length,) = LEVEL_PATH.unpack_from(data, offset)
+        offset += LEVEL_PATH.size
+        levels.append(data[offset:offset + length].decode("utf-8"))
+        offset += length
+    (run_count,) = RUN_COUNT.unpack_from(data, offset)
+    offset += RUN_COUNT.size
+    ticks = []
+    for _ in range(run_count):
+        count, mask = RUN.unpack_from(data, offset)
+        offset += RUN.size
+        ticks.extend([mask] * count)
+    return Replay(seed, tick_time, start_level, levels, ticks)
+
+
+# -------------------------------
+#   Воспроизведение
+# -------------------------------
+def create_game(replay, **kwargs):
+    """Game в том же состоянии, в каком начиналась запись."""
+    return Game(replay.levels, start_level=replay.start_level, seed=replay.seed, **kwargs)
+
+
+def apply_tick(game, replay, mask):
+    """Один записанный тик: перезапуск уровня или шаг с управлением. Возвращает результат шага."""
+    if mask & BIT_RESTART:
+        game.restart_level()
+        return None
+    return game.step(Controls.from_mask(mask), replay.tick_time)
+
+
+def state_digest(game):
+    """Короткий отпечаток состояния игры (для проверки, что повтор совпал с записью)."""
+    player = game.player
+    state = [game.current_level, game.frame, round(game.time, 3), tuple(player.rect), player.lives,
+             player.is_dead, len(player.bullets)]
+    for enemy in game.enemies:
+        state.append(tuple(enemy.rect))
+        if hasattr(enemy, 'health'):
+            state.append((enemy.health, enemy.state, len(enemy.bullets)))
+    return hashlib.sha1(repr(state).encode("utf-8")).hexdigest()[:16]
+
+
+def play_headless(replay, profiler=NULL_PROFILER):
+    """
+    Прогоняет повтор без отрисовки так быстро, как позволяет процессор.
+    Победа над боссом повтор не останавливает (в игре после неё тоже идут тики).
+    """
+    game = create_game(replay, profiler=profiler)
+    result = None
+    for mask in replay.ticks:
+        profiler.begin_frame()
+        result = apply_tick(game, replay, mask)
+        profiler.end_frame()
+        if result == STEP_GAME_COMPLETE:
+            break
+    return game, result
@@ -0,0 +1,24 @@
+"""
+Потоки случайных чисел по подсистемам.
+
+У каждой подсистемы (уровень, босс, ...) свой random.Random, выведенный из
+общего сида и имени потока. Поэтому при одном сиде прогон повторяется точно,
+а лишний вызов случайности в одной подсистеме не сдвигает числа в другой.
+Без сида потоки инициализируются системной случайностью, как раньше.
+"""
+import random
+
+
+class RandomStreams:
+    def __init__(self, seed=None):
+        self.seed = seed
+
+    def stream(self, name):
+        """Новый генератор для подсистемы name (при одном сиде — всегда одна и та же последовательность)."""
+        if self.seed is None:
+            return random.Random()
+        return random.Random(f"{self.seed}/{name}")
+
+    def child(self, name):
+        """Набор потоков для вложенной части (например, конкретного уровня)."""
+        return RandomStreams(None if self.seed is None else f"{self.seed}/{name}")
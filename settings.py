@@ -1,8 +1,33 @@
 WIDTH = 900
 HEIGHT = 600
 FPS = 60
+# Фиксированный шаг симуляции: логика всегда идёт TICK_RATE тиков в секунду,
+# а кадры рисуются с частотой FPS с интерполяцией между двумя последними тиками
+TICK_RATE = 60
+TICK_TIME = 1000 / TICK_RATE  # мс на тик
+MAX_FRAME_TIME = 250  # Дольше этого кадр не «догоняется» (после паузы/загрузки)
 WHITE = (255, 255, 255)
 BLUE = (0, 0, 255)
 GREEN = (20, 255, 0)
 
-TILE_SIZE = 50  # Размер тайла (используется для сетки уровня)
\ No newline at end of file
+TILE_SIZE = 50  # Размер тайла (используется для сетки уровня)
+
+# Режим «грязных прямоугольников»: перерисовываются и отправляются на экран
+# только области под движущимися объектами (полезно при программной отрисовке)
+DIRTY_RECT_RENDERING = False
+
+# Замеры времени по фазам кадра с самого старта (иначе включаются по F3 или флагом --profile;
+# оверлей — F3, сохранить трассу — F4)
+PROFILING = False
+
+# Разрешить врагам ходить по диагонали при поиске пути (без срезания углов стен)
+PATHFINDING_DIAGONAL = False
+
+# Планировщик ИИ врагов (см. ai_scheduler.py): бюджет «мышления» на тик в условных
+# единицах (восприятие — 1, построение пути — AI_PATH_COST), дальние враги
+# (дальше радиуса обнаружения + AI_NEAR_MARGIN) думают раз в AI_FAR_INTERVAL тиков
+AI_SCHEDULING = True
+AI_THINK_BUDGET = 32
+AI_PATH_COST = 4
+AI_NEAR_MARGIN = 100
+AI_FAR_INTERVAL = 4
@@ -0,0 +1,95 @@
+"""
+Кэши для меню и экранов: процедурные фоны, шрифты и отрисованный текст.
+
+Фон строится один раз для пары (размер, цвета) и дальше рисуется одним blit.
+Статичные надписи растеризуются один раз и берутся из LRU-кэша по ключу
+(шрифт, размер, текст, цвет, сглаживание). Для меняющихся значений
+(громкость и т.п.) есть render_dynamic: у каждой «ячейки» хранится только
+последняя отрисованная строка, поэтому кэш не растёт.
+"""
+from collections import OrderedDict
+
+import pygame
+
+TEXT_CACHE_SIZE = 256  # Сколько отрисованных надписей держать в кэше
+
+_backgrounds = {}  # ключ -> готовая Surface
+_fonts = {}  # (имя шрифта, размер) -> pygame.font.Font
+_text_cache = OrderedDict()  # (шрифт, размер, текст, цвет, сглаживание) -> Surface
+_dynamic_text = {}  # ячейка -> (ключ, Surface)
+
+
+def procedural_surface(key, build):
+    """Возвращает Surface из кэша, при первом обращении строит её через build()."""
+    surface = _backgrounds.get(key)
+    if surface is None:
+        surface = build()
+        _backgrounds[key] = surface
+    return surface
+
+
+def gradient_surface(size, top_color, bottom_color):
+    """
+    Вертикальный градиент от top_color к bottom_color.
+    Цвета строк собираются в один буфер-столбец шириной 1 пиксель,
+    который затем растягивается на всю ширину одним transform.scale.
+    """
+    def build():
+        width, height = size
+        rows = []
+        for y in range(height):
+            # Пропорция между top_color и bottom_color (как в построчной отрисовке)
+            ratio = y / height
+            rows.append(bytes(int(top + (bottom - top) * ratio) for top, bottom in zip(top_color, bottom_color)))
+        column = pygame.image.frombuffer(b''.join(rows), (1, height), 'RGB')
+        surface = pygame.transform.scale(column, (width, height))
+        return surface.convert() if pygame.display.get_surface() else surface
+
+    return procedural_surface(('gradient', tuple(size), tuple(top_color), tuple(bottom_color)), build)
+
+
+# -------------------------------
+#   Шрифты и текст
+# -------------------------------
+def get_font(size, name=None):
+    """Шрифт из реестра (SysFont создаётся один раз на имя и размер)."""
+    key = (name, size)
+    font = _fonts.get(key)
+    if font is None:
+        font = pygame.font.SysFont(name, size)
+        _fonts[key] = font
+    return font
+
+
+def render_text(text, size, color, name=None, antialias=True):
+    """Надпись из LRU-кэша; при промахе растеризуется и вытесняет самую старую."""
+    key = (name, size, text, tuple(color), antialias)
+    surface = _text_cache.get(key)
+    if surface is not None:
+        _text_cache.move_to_end(key)
+        return surface
+    surface = get_font(size, name).render(text, antialias, color)
+    _text_cache[key] = surface
+    if len(_text_cache) > TEXT_CACHE_SIZE:
+        _text_cache.popitem(last=False)
+    return surface
+
+
+def render_dynamic(slot, text, size, color, name=None, antialias=True):
+    """
+    Надпись с меняющимся значением (например, процент громкости).
+    Для ячейки slot хранится только последняя строка: пока текст тот же,
+    возвращается готовая Surface, иначе она перерисовывается и заменяется.
+    """
+    key = (name, size, text, tuple(color), antialias)
+    cached = _dynamic_text.get(slot)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    surface = get_font(size, name).render(text, antialias, color)
+    _dynamic_text[slot] = (key, surface)
+    return surface
+
+
+def clear_text_cache():
+    _text_cache.clear()
+    _dynamic_text.clear()